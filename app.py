@@ -1,13 +1,16 @@
-from flask import Flask, render_template_string
-from supabase import create_client, Client
+import threading
 
-SUPABASE_URL = "https://vpbjmgwqodhuprpovslh.supabase.co"
-SUPABASE_KEY = "sb_publishable_iMCD5saQ85EaP6msbviM2g_XZ9DcV8t"
+from flask import Flask, jsonify
 
-assert SUPABASE_URL and SUPABASE_KEY, "Supabase env vars missing"
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from catalog_stats import STATS_SECTIONS
+from catalog_store import CatalogStore
+
+# One store per worker process; the Supabase client inside it is pooled and reused.
+catalog = CatalogStore()
 
 app = Flask(__name__)
+# Stats sections are ordered (tags by count); keep that order in the JSON.
+app.json.sort_keys = False
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -310,11 +313,56 @@ HTML_TEMPLATE = """
 """
 
 
+# Compiled once instead of on every request, as render_template_string would.
+CATALOG_PAGE = app.jinja_env.from_string(HTML_TEMPLATE)
+page_lock = threading.Lock()
+# (rows, html): the last rendered page and the rows object it came from.
+rendered_page = (None, "")
+
+
+def catalog_page(products: list) -> str:
+    # Re-rendered only when the store hands out new rows.
+    global rendered_page
+    rows, html = rendered_page
+    if rows is products:
+        return html
+    with page_lock:
+        rows, html = rendered_page
+        if rows is not products:
+            html = CATALOG_PAGE.render(products=products)
+            rendered_page = (products, html)
+    return html
+
+
 @app.route("/")
 def home():
-    data = supabase.table("products").select("*").execute()
-    products = data.data
-    return render_template_string(HTML_TEMPLATE, products=products)
+    return catalog_page(catalog.products())
+
+
+def stats_response(payload: dict):
+    response = jsonify(payload)
+    # Stats change once per ingest; let dashboards and proxies reuse them.
+    response.headers["Cache-Control"] = f"public, max-age={int(catalog.ttl)}"
+    return response
+
+
+@app.route("/api/stats")
+def stats():
+    # One precomputed row instead of a scan of the products table.
+    stats = catalog.stats()
+    if stats is None:
+        return jsonify({"error": "no catalog stats yet; run catalog_ingest.py"}), 404
+    return stats_response(stats)
+
+
+@app.route("/api/stats/<section>")
+def stats_section(section: str):
+    if section not in STATS_SECTIONS:
+        return jsonify({"error": f"unknown section {section!r}", "sections": list(STATS_SECTIONS)}), 404
+    stats = catalog.stats()
+    if stats is None:
+        return jsonify({"error": "no catalog stats yet; run catalog_ingest.py"}), 404
+    return stats_response({"computed_at": stats.get("computed_at"), section: stats.get(section)})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from benchmarks.bench_stages import percentile
+
+
+# Run from the repository root: python -m benchmarks.bench_app [--duration 10] [--concurrency 64]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROWS = 500
+BACKEND_LATENCY_MS = 50.0
+CONCURRENCY = 64
+DURATION = 10.0
+WORKERS = 2
+STARTUP_TIMEOUT = 20.0
+# name -> (gunicorn arguments, CATALOG_TTL). "sync" is the old setup: one request
+# per worker process and one Supabase query per page view. It must not pick up
+# gunicorn.conf.py from the working directory, whose threads would make it gthread.
+SETUPS = {
+    "sync": (["-c", os.devnull, "-k", "sync"], "0"),
+    "gthread_uncached": (["-c", "gunicorn.conf.py"], "0"),
+    "gthread": (["-c", "gunicorn.conf.py"], "30"),
+}
+
+
+def catalog_rows(count: int) -> List[dict]:
+    return [
+        {
+            "id": index + 1,
+            "Product_URL": f"https://www.nike.com/ph/t/product-{index}/AB{index:04d}-{index % 10:03d}",
+            "Product_Image_URL": f"https://static.nike.com/a/images/{index}.png",
+            "Product_Tagging": "Just In" if index % 3 else "",
+            "Product_Name": f"Nike Product {index}",
+            "Product_Description": "Women's Shoes",
+            "Original_Price": f"₱{2000 + index % 9000:,}.00",
+            "Discount_Price": f"₱{1500 + index % 9000:,}.00" if index % 2 else "",
+            "Sizes_Available": "US 5 | US 6 | US 7 | US 8",
+            "Vouchers": "",
+            "Available_Colors": f"{1 + index % 6} Colors",
+            "Color_Shown": "Black/White",
+            "Style_Code": f"AB{index:04d}-{index % 10:03d}",
+            "Rating_Score": f"{3 + index % 20 / 10:.1f}",
+            "Review_Count": str(index * 7 % 900),
+        }
+        for index in range(count)
+    ]
+
+
+class StandInBackend(ThreadingHTTPServer):
+    """Answers the PostgREST products query with fixed rows after ``latency_ms``."""
+
+    daemon_threads = True
+
+    def __init__(self, rows: List[dict], latency_ms: float):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.body = json.dumps(rows).encode("utf-8")
+        self.latency = latency_ms / 1000
+        self.queries = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if not self.path.startswith("/rest/v1/products"):
+            self.send_error(404)
+            return
+        with self.server.lock:
+            self.server.queries += 1
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_ready(port: int, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not answer in time")
+
+
+def load(port: int, concurrency: int, duration: float) -> Dict[str, object]:
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client() -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        own: List[float] = []
+        failed = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request("GET", "/")
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                continue
+            own.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def measure_setup(name: str, backend: StandInBackend, workers: int, concurrency: int, duration: float) -> dict:
+    arguments, ttl = SETUPS[name]
+    port = free_port()
+    env = dict(os.environ, SUPABASE_URL=backend.url, CATALOG_TTL=ttl)
+    command = [sys.executable, "-m", "gunicorn", *arguments, "-b", f"127.0.0.1:{port}", "-w", str(workers), "app:app"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, process)
+        before = backend.queries
+        result = load(port, concurrency, duration)
+        result["backend_queries"] = backend.queries - before
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {"setup": name, "workers": workers, "concurrency": concurrency, **result}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the catalog app under gunicorn against a stand-in Supabase")
+    parser.add_argument("setups", nargs="*", default=list(SETUPS), help=f"Any of {', '.join(SETUPS)}")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--latency-ms", type=float, default=BACKEND_LATENCY_MS, help="Stand-in query latency")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=DURATION, help="Seconds per setup")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="gunicorn worker processes")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    backend = StandInBackend(catalog_rows(args.rows), args.latency_ms)
+    threading.Thread(target=backend.serve_forever, daemon=True).start()
+    try:
+        results = [
+            measure_setup(name, backend, args.workers, args.concurrency, args.duration) for name in args.setups
+        ]
+    finally:
+        backend.shutdown()
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "rows": args.rows,
+        "backend_latency_ms": args.latency_ms,
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
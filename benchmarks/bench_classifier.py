@@ -0,0 +1,147 @@
+import argparse
+import json
+import platform
+import random
+import sys
+from typing import Dict, List, Optional
+
+from benchmarks.bench_stages import measure
+from job_classifier import LineClassifier, load_classifier, load_rules
+from jungle_scraper_v2 import CARD_TRANSFORMS
+from jungle_search_api import empty_job
+from replay import ReplayArchive
+
+
+# Run from the repository root: python -m benchmarks.bench_classifier [--archive jungle.jsonl.gz]
+SYNTHETIC_CARDS = 50000
+BATCH_SIZE = 1000
+ROUNDS = 3
+
+TITLES = ["Business Developer", "Account Executive", "Sales Manager", "Business Analyst", "Growth Lead"]
+COMPANIES = ["Via", "Inato", "Socomec", "Alan", "Qonto", "Doctolib", "Back Market", "Swile"]
+CONTRACTS = ["Permanent contract", "Internship", "Fixed-term contract", "Temporary", "Freelance"]
+REMOTE = ["Fully-remote", "Occasional remote", "Hybrid", "No remote work", "On-site"]
+LOCATIONS = ["New York", "Boston", "Chicago", "Paris", "London", "Austin, Texas", "San Francisco, California"]
+FILLER = ["Salary: Not specified", "Apply now", "Save", "Featured", "Software", "SaaS / Cloud Services"]
+
+
+def synthetic_cards(count: int = SYNTHETIC_CARDS, seed: int = 0) -> List[List[str]]:
+    # Deterministic card texts with the same vocabulary mix as the listing pages.
+    rng = random.Random(seed)
+    cards = []
+    for _ in range(count):
+        lines = [
+            rng.choice(TITLES) + (f" {rng.randint(1, 400)}" if rng.random() < 0.5 else ""),
+            rng.choice(COMPANIES),
+            rng.choice(CONTRACTS),
+            rng.choice(LOCATIONS),
+            rng.choice(REMOTE),
+            f"{rng.choice([12, 50, 185, 200, 300, 420, 1200])} employees",
+            rng.choice(["yesterday", "today"] + [f"{n} days ago" for n in range(2, 30)] + ["4 hours ago"]),
+        ]
+        details = lines[2:] + rng.sample(FILLER, rng.randint(0, 3))
+        rng.shuffle(details)
+        cards.append(lines[:2] + details)
+    return cards
+
+
+def recorded_cards(archive: ReplayArchive) -> List[List[str]]:
+    from bs4 import BeautifulSoup
+
+    cards = []
+    for body in archive.bodies("welcometothejungle.com"):
+        soup = BeautifulSoup(body.decode("utf-8", errors="replace"), "html.parser")
+        for card in soup.find_all("article"):
+            text = card.get_text(separator="\n", strip=True)
+            lines = [line.strip() for line in text.split("\n") if len(line.strip()) > 1]
+            if len(lines) >= 2:
+                cards.append(lines)
+    return cards
+
+
+def legacy_assign(lines: List[str]) -> Dict[str, str]:
+    # The any()-chains fast_extract_jobs used before, with the keyword lists from
+    # job_field_rules.json. Plain substring tests, so "Chicago" also counts as "ago".
+    job = empty_job()
+    for line in lines:
+        line_lower = line.lower()
+        if "employee" in line_lower and not job["Employes_Count"]:
+            job["Employes_Count"] = CARD_TRANSFORMS["Employes_Count"](line)
+        if ("ago" in line_lower or "yesterday" in line_lower or "today" in line_lower) and not job["Posted_Ago"]:
+            job["Posted_Ago"] = CARD_TRANSFORMS["Posted_Ago"](line)
+        if any(k in line_lower for k in ["permanent", "contract", "internship", "temporary"]) and not job["Job_Type"]:
+            job["Job_Type"] = line
+        if any(k in line_lower for k in ["remote", "hybrid", "on-site"]) and not job["Work_Location"]:
+            job["Work_Location"] = line
+        if any(k in line for k in ["New York", "California", "Texas", "Boston", "Chicago", "USA", "United States"]) \
+                and not job["Location"]:
+            job["Location"] = line
+    return job
+
+
+def run_benchmarks(cards: List[List[str]], rounds: int = ROUNDS) -> List[Dict[str, float]]:
+    batches = [cards[i:i + BATCH_SIZE] for i in range(0, len(cards), BATCH_SIZE)]
+    classifier = load_classifier()
+    uncached = LineClassifier(load_rules())
+
+    def compiled(batch: List[List[str]]) -> None:
+        for lines in batch:
+            classifier.assign(empty_job(), lines, CARD_TRANSFORMS, exclusive=False)
+
+    def compiled_uncached(batch: List[List[str]]) -> None:
+        uncached.cache.clear()
+        for lines in batch:
+            uncached.assign(empty_job(), lines, CARD_TRANSFORMS, exclusive=False)
+            uncached.cache.clear()
+
+    def legacy(batch: List[List[str]]) -> None:
+        for lines in batch:
+            legacy_assign(lines)
+
+    results = []
+    for name, func in [("legacy_keyword_chains", legacy), ("compiled", compiled), ("compiled_no_cache", compiled_uncached)]:
+        result = measure(name, batches, func, rounds)
+        # measure() counts batches; report cards per second.
+        result["cards_per_second"] = round(result["throughput"] * BATCH_SIZE, 1)
+        results.append(result)
+
+    # Differences are expected only where a keyword sat inside another word.
+    differences = [
+        lines for lines in cards
+        if classifier.assign(empty_job(), lines, CARD_TRANSFORMS, exclusive=False) != legacy_assign(lines)
+    ]
+    results.append({
+        "stage": "agreement",
+        "cards": len(cards),
+        "differences": len(differences),
+        "example": differences[0] if differences else None,
+    })
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark job card line classification")
+    parser.add_argument("--archive", help="Recorded archive with jungle listing pages (default: synthetic cards)")
+    parser.add_argument("--cards", type=int, default=SYNTHETIC_CARDS)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    cards = recorded_cards(ReplayArchive.load(args.archive)) if args.archive else synthetic_cards(args.cards)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "archive": args.archive or "synthetic",
+        "results": run_benchmarks(cards, args.rounds),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
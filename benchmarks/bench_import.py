@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+
+# Run from the repository root: python -m benchmarks.bench_import [--save-baseline]
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "import_baseline.json")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Millisecond-scale timings are noisy; the heavy-module check is the strict gate.
+TOLERANCE = 0.5
+ROUNDS = 5
+ENTRY_POINTS = [
+    "nike_scraper",
+    "nike_markets",
+    "jungle_scraper_v2",
+    "jungle_crawl",
+    "jungle_search_api",
+    "replay",
+]
+# Only needed on fallback paths; importing any of them at startup is a regression.
+HEAVY_MODULES = ["selenium", "webdriver_manager", "bs4", "pandas", "numpy"]
+TOP_IMPORTS = 8
+
+PROBE = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print(json.dumps({{'import_ms': elapsed * 1000, 'modules': sorted({{m.split('.')[0] for m in sys.modules}})}}))\n"
+)
+
+
+def parse_importtime(stderr: str, module: str) -> Dict[str, int]:
+    # "import time: self [us] | cumulative | imported package", children listed before
+    # their parent and indented two spaces per level; keep the module's direct imports.
+    children: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        if not total.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(total)
+        elif depth == 0:
+            if name.strip() == module:
+                return children
+            children = {}
+    return {}
+
+
+def measure_import(module: str, rounds: int = ROUNDS) -> dict:
+    import_ms: List[float] = []
+    process_ms: List[float] = []
+    modules: List[str] = []
+    packages: Dict[str, int] = {}
+    for _ in range(rounds):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        process_ms.append((time.perf_counter() - started) * 1000)
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        import_ms.append(probe["import_ms"])
+        modules = probe["modules"]
+        packages = parse_importtime(completed.stderr, module)
+
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+    # Best-of-N: a cold interpreter start is dominated by disk and scheduler noise.
+    return {
+        "module": module,
+        "import_ms": round(min(import_ms), 2),
+        "process_ms": round(min(process_ms), 2),
+        "heavy_loaded": [name for name in HEAVY_MODULES if name in modules],
+        "slowest_imports_ms": {name: round(us / 1000, 2) for name, us in slowest},
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    previous = {entry["module"]: entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        if entry["heavy_loaded"]:
+            regressions.append(f"{entry['module']}: imports {', '.join(entry['heavy_loaded'])} at startup")
+        old = previous.get(entry["module"])
+        if old and entry["import_ms"] > old["import_ms"] * (1 + tolerance):
+            regressions.append(f"{entry['module']}: import {entry['import_ms']}ms > baseline {old['import_ms']}ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the scraper entry points")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = [measure_import(module, args.rounds) for module in args.modules]
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            baseline_file.write(text + "\n")
+        return 0
+
+    baseline = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file).get("results", [])
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print("REGRESSION " + line, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from seen_set import DEFAULT_ERROR_RATE, SEEN_BACKENDS, open_seen_set
+
+
+# Run from the repository root: python -m benchmarks.bench_seen_set [--keys 1000000]
+KEYS = 1_000_000
+
+
+def job_link(index: int) -> str:
+    return f"https://www.welcometothejungle.com/en/companies/company-{index % 5000}/jobs/business-developer-{index}"
+
+
+def measure_backend(backend: str, keys: int, error_rate: float, directory: str) -> Dict[str, object]:
+    path = os.path.join(directory, f"seen.{backend}") if backend != "memory" else None
+    started = time.perf_counter()
+    seen = open_seen_set(backend, path, capacity=keys, error_rate=error_rate)
+    for index in range(keys):
+        seen.add(job_link(index))
+    insert_seconds = time.perf_counter() - started
+
+    # Footprint from a second, traced fill: tracemalloc slows the loop too much to time it.
+    tracemalloc.start()
+    traced = open_seen_set(backend, path and path + ".traced", capacity=keys, error_rate=error_rate)
+    for index in range(keys):
+        traced.add(job_link(index))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    traced.close()
+
+    # Every key again (all seen), then as many never-added keys to count false positives.
+    started = time.perf_counter()
+    missed = sum(1 for index in range(keys) if job_link(index) not in seen)
+    false_positives = sum(1 for index in range(keys, 2 * keys) if job_link(index) in seen)
+    lookup_seconds = time.perf_counter() - started
+    seen.close()
+
+    return {
+        "backend": backend,
+        "keys": keys,
+        "inserts_per_second": round(keys / insert_seconds, 1),
+        "lookups_per_second": round(2 * keys / lookup_seconds, 1),
+        "peak_python_mb": round(peak / (1024 * 1024), 1),
+        "file_mb": round(os.path.getsize(path) / (1024 * 1024), 1) if path and os.path.exists(path) else 0.0,
+        "false_negatives": missed,
+        "false_positive_rate": round(false_positives / keys, 5),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare seen-set backends on synthetic job links")
+    parser.add_argument("backends", nargs="*", default=list(SEEN_BACKENDS))
+    parser.add_argument("--keys", type=int, default=KEYS)
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="seen-bench-") as directory:
+        results = [measure_backend(backend, args.keys, args.error_rate, directory) for backend in args.backends]
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
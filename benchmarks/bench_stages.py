@@ -0,0 +1,287 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from base64 import b64decode
+from dataclasses import asdict
+from importlib.util import find_spec
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+from nike_scraper import NikeScraperPH, Product, extract_html_details, extract_pdp_details
+from replay import ReplayArchive, request_key
+
+
+# Run from the repository root: python -m benchmarks.bench_stages [--archive x.jsonl.gz]
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+TOLERANCE = 0.25
+SYNTHETIC_PRODUCTS = 600
+PAGE_SIZE = 60
+ROUNDS = 5
+
+
+def synthetic_archive(count: int = SYNTHETIC_PRODUCTS) -> ReplayArchive:
+    # Deterministic stand-in shaped like the rollup payloads and PDP pages.
+    archive = ReplayArchive()
+    for start in range(0, count, PAGE_SIZE):
+        items = []
+        for i in range(start, min(start + PAGE_SIZE, count)):
+            full = 2000 + (i * 37) % 9000
+            items.append({
+                "productInfo": [{
+                    "merchProduct": {
+                        "url": f"/ph/t/product-{i}/AB{i:04d}-{i % 10:03d}",
+                        "label": f"Nike Product {i}",
+                        "subtitle": "Women's Shoes",
+                        "styleColor": f"AB{i:04d}-{i % 10:03d}",
+                        "colorDescription": "Black/White",
+                        "productTags": ["Sustainable Materials"] if i % 3 else [],
+                    },
+                    "merchPrice": {
+                        "fullPrice": full,
+                        "currentPrice": full * 0.7 if i % 2 else full,
+                        "discounted": bool(i % 2),
+                    },
+                    "imageUrls": {"productImageUrl": f"https://static.nike.com/a/images/{i}.png"},
+                    "colorOptions": [{}] * (1 + i % 4),
+                }]
+            })
+        body = json.dumps({"data": {"products": {"products": items}}}).encode("utf-8")
+        archive.add(f"GET api.nike.com/product_feed/rollup_threads/v2?anchor={start}", 200, {}, body)
+
+    for i in range(count):
+        sizes = "".join(f"<li data-qa='size-available'>{size}</li>" for size in range(5, 11))
+        state = {"props": {"pageProps": {
+            "selectedProduct": {
+                "styleColor": f"AB{i:04d}-{i % 10:03d}",
+                "colorDescription": "Black/White",
+                "sizes": [
+                    {"label": str(size), "status": "ACTIVE" if (i + size) % 4 else "INACTIVE"}
+                    for size in range(5, 11)
+                ],
+            },
+            "reviews": {"averageRating": 3 + (i % 20) / 10, "total": 100 + (i * 13) % 400},
+        }}}
+        html = (
+            "<html><head><title>Nike</title></head><body><main>"
+            f"<h1>Nike Product {i}</h1><ul>{sizes}</ul>"
+            f"<p>Colour Shown: Black/White</p><p>Style: AB{i:04d}-{i % 10:03d}</p>"
+            f"<p>{3 + (i % 20) / 10:.1f} ({100 + (i * 13) % 400} Reviews)</p>"
+            "<p>Members get 10% off with voucher</p>"
+            + "<div class='filler'>" + "Lorem ipsum dolor sit amet. " * 200 + "</div>"
+            "</main><script id=\"__NEXT_DATA__\" type=\"application/json\">"
+            + json.dumps(state) + "</script></body></html>"
+        )
+        archive.add(f"GET www.nike.com/ph/t/product-{i}/AB{i:04d}-{i % 10:03d}", 200, {}, html.encode("utf-8"))
+    return archive
+
+
+def pdp_body(archive: ReplayArchive, url: str) -> Optional[bytes]:
+    # The PDP response recorded for this product, under the key fetch_product_page produced.
+    parsed = urlparse(url)
+    entries = archive.entries.get(request_key("GET", parsed.netloc, parsed.path, parsed.query))
+    return b64decode(entries[0]["body"]) if entries else None
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(name: str, items: Sequence, func: Callable, rounds: int = ROUNDS) -> Dict[str, float]:
+    if items:
+        func(items[0])  # warm caches (template compile, regex, imports) outside the timing
+    latencies: List[float] = []
+    round_times: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for item in items:
+            begin = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - begin)
+        round_times.append(time.perf_counter() - started)
+    # Throughput comes from the fastest round; slower rounds are mostly scheduler noise.
+    best = min(round_times) if round_times else 0.0
+    return {
+        "stage": name,
+        "ops": len(items) * rounds,
+        "seconds": round(sum(round_times), 4),
+        "throughput": round(len(items) / best, 2) if best else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_benchmarks(archive: ReplayArchive, rounds: int = ROUNDS) -> List[Dict[str, float]]:
+    with tempfile.TemporaryDirectory(prefix="nike-bench-") as tmpdir:
+        return run_stages(archive, rounds, tmpdir)
+
+
+def run_stages(archive: ReplayArchive, rounds: int, tmpdir: str) -> List[Dict[str, float]]:
+    scraper = NikeScraperPH()
+    results = []
+
+    listing_bodies = archive.bodies("rollup_threads") + archive.bodies("cic/browse")
+    results.append(measure(
+        "payload_parsing",
+        listing_bodies,
+        lambda body: scraper.parse_products_from_payload(json.loads(body)),
+        rounds,
+    ))
+
+    products: List[Product] = []
+    for body in listing_bodies:
+        products.extend(scraper.parse_products_from_payload(json.loads(body)))
+    scraper.products = products
+
+    pdp_bodies = archive.bodies("/t/")
+    results.append(measure("pdp_extraction", pdp_bodies, extract_pdp_details, rounds))
+    # The rendered-markup fallback, for pages without embedded state.
+    results.append(measure("pdp_extraction_html", pdp_bodies, extract_html_details, rounds))
+
+    # Products without a recorded PDP keep their listing data, as after a failed fetch.
+    for product in products:
+        body = pdp_body(archive, product.Product_URL)
+        if body is not None:
+            scraper.apply_product_details(product, extract_pdp_details(body))
+
+    results.append(measure("validation", [products], lambda _: scraper.get_valid_products(), rounds))
+
+    def rank(_: object) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.print_top_expensive([p for p in products if p.Discount_Price.strip()])
+        scraper.save_top_20_rating_review(os.path.join(tmpdir, "top_20.csv"))
+
+    results.append(measure("top_k_ranking", [products], rank, rounds))
+
+    valid = scraper.get_valid_products()
+    results.append(measure(
+        "csv_export",
+        [valid],
+        lambda rows: scraper.save_products_csv(rows, os.path.join(tmpdir, "products.csv")),
+        rounds,
+    ))
+
+    if find_spec("pyarrow") or find_spec("fastparquet"):
+        import pandas as pd
+
+        def export_parquet(rows: List[Product]) -> None:
+            pd.DataFrame([asdict(p) for p in rows]).to_parquet(os.path.join(tmpdir, "products.parquet"))
+
+        results.append(measure("columnar_export", [valid], export_parquet, rounds))
+    else:
+        results.append({"stage": "columnar_export", "skipped": "no parquet engine installed"})
+
+    results.extend(measure_app_render([asdict(p) for p in products], rounds))
+    return results
+
+
+def measure_app_render(rows: List[dict], rounds: int) -> List[Dict[str, float]]:
+    try:
+        import app as catalog_app
+        from catalog_store import CatalogStore
+    except Exception as exc:
+        return [{"stage": "app_render", "skipped": f"app not importable: {exc}"}]
+
+    class FixtureStore(CatalogStore):
+        # The real TTL cache in front of the crawl's rows instead of Supabase.
+        def query(self) -> List[dict]:
+            return list(rows)
+
+    client = catalog_app.app.test_client()
+
+    def view(_: object) -> None:
+        response = client.get("/")
+        if response.status_code != 200:
+            raise RuntimeError(f"GET / returned {response.status_code}")
+
+    store = catalog_app.catalog
+    try:
+        # ttl=0: every view re-queries and re-renders CATALOG_PAGE, the cost of a cache miss.
+        catalog_app.catalog = FixtureStore(ttl=0)
+        render = measure("app_render", [rows], view, rounds)
+        # Views within the TTL share the store's rows and the rendered page.
+        catalog_app.catalog = FixtureStore(ttl=3600)
+        cached = measure("app_page", [rows], view, rounds)
+    finally:
+        catalog_app.catalog = store
+    return [render, cached]
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    previous = {entry["stage"]: entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        old = previous.get(entry["stage"])
+        if not old or "throughput" not in entry or "throughput" not in old:
+            continue
+        if entry["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{entry['stage']}: throughput {entry['throughput']} < baseline {old['throughput']}"
+            )
+        # Tail latency is noisier than the median, so it gets twice the slack.
+        if old["p50_ms"] and entry["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{entry['stage']}: p50 {entry['p50_ms']}ms > baseline {old['p50_ms']}ms")
+        if old["p99_ms"] and entry["p99_ms"] > old["p99_ms"] * (1 + 2 * tolerance):
+            regressions.append(f"{entry['stage']}: p99 {entry['p99_ms']}ms > baseline {old['p99_ms']}ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark scraper stages on recorded payloads")
+    parser.add_argument("--archive", help="Recorded archive from replay.py (default: synthetic data)")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    archive = ReplayArchive.load(args.archive) if args.archive else synthetic_archive()
+    results = run_benchmarks(archive, args.rounds)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "archive": args.archive or "synthetic",
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            baseline_file.write(text + "\n")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file).get("results", [])
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
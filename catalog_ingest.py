@@ -0,0 +1,68 @@
+import argparse
+import csv
+import logging
+import os
+from typing import List, Optional
+
+from catalog_stats import compute_stats, load_stats, stats_file_for
+from catalog_store import CatalogStore
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def read_products_csv(path: str) -> List[dict]:
+    with open(path, newline="", encoding="utf-8") as csvfile:
+        return [dict(row) for row in csv.DictReader(csvfile)]
+
+
+def export_stats(path: str, rows: List[dict]) -> Optional[dict]:
+    # The export's stats, if they describe exactly these rows; None means recompute.
+    if not os.path.exists(path):
+        return None
+    stats = load_stats(path)
+    if stats["counts"]["products"] != len(rows):
+        logger.warning(
+            "%s describes %s products but the ingested CSV has %s; recomputing",
+            path,
+            stats["counts"]["products"],
+            len(rows),
+        )
+        return None
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load an export into Supabase: the products table and its precomputed catalog stats"
+    )
+    parser.add_argument("--products", default="products_data.csv", help="Products CSV from the scraper")
+    parser.add_argument(
+        "--stats",
+        help="Stats written by the same export (default: the catalog_stats file named after --products); "
+        "recomputed from --products when missing or for a different product count",
+    )
+    parser.add_argument("--recompute", action="store_true", help="Compute stats from --products even if --stats exists")
+    parser.add_argument("--stats-only", action="store_true", help="Only refresh the stats row")
+    parser.add_argument("--on-conflict", default="Product_URL", help="Unique column the product upsert matches on")
+    args = parser.parse_args()
+
+    store = CatalogStore()
+    rows = read_products_csv(args.products)
+
+    if not args.stats_only:
+        store.upsert_products(rows, on_conflict=args.on_conflict)
+        logger.info("Upserted %s products into %s", len(rows), store.table)
+
+    # Stats always describe the rows just ingested: the export writes them over
+    # the same products it puts in the CSV.
+    stats = None if args.recompute else export_stats(args.stats or stats_file_for(args.products), rows)
+    if stats is None:
+        stats = compute_stats(rows)
+    store.save_stats(stats)
+    logger.info("Saved catalog stats computed at %s (%s products)", stats["computed_at"], stats["counts"]["products"])
+
+
+if __name__ == "__main__":
+    main()
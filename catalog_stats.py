@@ -0,0 +1,196 @@
+import json
+import os
+import re
+import statistics
+import time
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from nike_priority import RANKING_MIN_REVIEWS
+
+
+STATS_FILE = "catalog_stats.json"
+TOP_EXPENSIVE = 10
+TOP_RATED = 20
+# Lower bounds of the final-price bands, in the market currency.
+PRICE_BANDS = [0, 2000, 4000, 6000, 8000, 10000]
+UNTAGGED = "(untagged)"
+STATS_SECTIONS = ("counts", "tagging", "prices", "top_expensive", "top_rated")
+
+PRICE_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+# Leading currency symbols and codes stripped before the fast float() parse.
+CURRENCY_CHARS = "₱$€£¥RMSP \u00a0"
+
+Row = Mapping[str, Any]
+
+
+def text(row: Row, key: str) -> str:
+    # Supabase returns numbers and nulls where the CSV has strings.
+    value = row.get(key)
+    if value.__class__ is str:
+        return value.strip()
+    return "" if value is None else str(value).strip()
+
+
+def price_value(price_text: str) -> Optional[float]:
+    # "₱4,219.00", "S$129.00", "RM 399" -> the number, whatever the currency symbol.
+    if not price_text:
+        return None
+    try:
+        return float(price_text.lstrip(CURRENCY_CHARS).replace(",", ""))
+    except ValueError:
+        match = PRICE_PATTERN.search(price_text)
+        return float(match.group().replace(",", "")) if match else None
+
+
+def final_price(row: Row) -> Optional[float]:
+    return price_value(text(row, "Discount_Price")) or price_value(text(row, "Original_Price"))
+
+
+def top_expensive(rows: Iterable[Row], limit: int = TOP_EXPENSIVE) -> List[Dict[str, Any]]:
+    """Discounted products by discount price, most expensive first."""
+    priced = []
+    for row in rows:
+        price = price_value(text(row, "Discount_Price"))
+        if price is not None:
+            priced.append((price, row))
+    priced.sort(key=lambda item: item[0], reverse=True)
+    return [
+        {
+            "Rank": rank,
+            "Product_Name": text(row, "Product_Name"),
+            "Discount_Price": text(row, "Discount_Price"),
+            "Product_URL": text(row, "Product_URL"),
+        }
+        for rank, (_, row) in enumerate(priced[:limit], 1)
+    ]
+
+
+def top_rated(rows: Iterable[Row], limit: int = TOP_RATED) -> List[Dict[str, Any]]:
+    """Products with more than RANKING_MIN_REVIEWS reviews by rating, then review count.
+
+    Products tied on both share a rank (1, 2, 2, 4).
+    """
+    # (rating, reviews, row); the rating is None when it does not parse.
+    eligible = []
+    for row in rows:
+        try:
+            reviews = int(text(row, "Review_Count"))
+        except ValueError:
+            continue
+        if reviews <= RANKING_MIN_REVIEWS:
+            continue
+        try:
+            rating = float(text(row, "Rating_Score") or 0.0)
+        except ValueError:
+            rating = None
+        eligible.append((rating, reviews, row))
+
+    eligible.sort(key=lambda item: (-(item[0] or 0.0), -item[1]))
+
+    ranked = []
+    current_rank = 0
+    last_rating = None
+    last_reviews = None
+
+    for idx, (rating, reviews, row) in enumerate(eligible[:limit], 1):
+        if rating is None:
+            continue
+
+        if rating != last_rating or reviews != last_reviews:
+            current_rank = idx
+        last_rating = rating
+        last_reviews = reviews
+
+        ranked.append({
+            "Rank": current_rank,
+            "Product_Name": text(row, "Product_Name"),
+            "Rating_Score": text(row, "Rating_Score"),
+            "Review_Count": text(row, "Review_Count"),
+            "Original_Price": text(row, "Original_Price"),
+            "Discount_Price": text(row, "Discount_Price"),
+            "Product_URL": text(row, "Product_URL"),
+        })
+    return ranked
+
+
+def tag_counts(rows: Sequence[Row]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for row in rows:
+        tags = [tag.strip() for tag in text(row, "Product_Tagging").split("|") if tag.strip()]
+        for tag in tags or [UNTAGGED]:
+            counts[tag] = counts.get(tag, 0) + 1
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def price_distribution(rows: Sequence[Row], bands: Sequence[float] = PRICE_BANDS) -> Dict[str, Any]:
+    prices = sorted(price for price in (final_price(row) for row in rows) if price is not None)
+    labels = [f"{int(low)}-{int(high)}" for low, high in zip(bands, bands[1:])] + [f"{int(bands[-1])}+"]
+    counts = dict.fromkeys(labels, 0)
+    for price in prices:
+        counts[labels[max(0, bisect_right(bands, price) - 1)]] += 1
+    summary: Dict[str, Any] = {"priced": len(prices), "bands": counts}
+    if prices:
+        quartiles = statistics.quantiles(prices, n=4) if len(prices) > 1 else [prices[0]] * 3
+        summary.update({
+            "min": prices[0],
+            "p25": round(quartiles[0], 2),
+            "median": round(quartiles[1], 2),
+            "p75": round(quartiles[2], 2),
+            "max": prices[-1],
+            "mean": round(statistics.fmean(prices), 2),
+        })
+    discounts = []
+    for row in rows:
+        sale, full = price_value(text(row, "Discount_Price")), price_value(text(row, "Original_Price"))
+        if sale is not None and full and sale < full:
+            discounts.append(1 - sale / full)
+    summary["mean_discount_percent"] = round(100 * statistics.fmean(discounts), 1) if discounts else 0.0
+    return summary
+
+
+def compute_stats(rows: Iterable[Row]) -> Dict[str, Any]:
+    """Aggregates for dashboards, computed once per export or ingest.
+
+    ``rows`` are the products the export writes to products_data.csv, so the
+    stats describe the table the app serves. ``top_expensive`` and
+    ``top_rated`` rank them the way the scraper ranks its own lists.
+    """
+    rows = list(rows)
+    tagged = sum(1 for row in rows if text(row, "Product_Tagging"))
+    discounted = [row for row in rows if text(row, "Discount_Price")]
+    return {
+        "computed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "counts": {
+            "products": len(rows),
+            "tagged": tagged,
+            "untagged": len(rows) - tagged,
+            "discounted": len(discounted),
+            "tagged_and_discounted": sum(1 for row in discounted if text(row, "Product_Tagging")),
+            "rated": sum(1 for row in rows if text(row, "Rating_Score")),
+        },
+        "tagging": tag_counts(rows),
+        "prices": price_distribution(rows),
+        "top_expensive": top_expensive(discounted),
+        "top_rated": top_rated(rows),
+    }
+
+
+def stats_file_for(products_file: str) -> str:
+    # products_data_sg.csv -> catalog_stats_sg.json in the same directory, as the export names them.
+    directory, name = os.path.split(products_file)
+    stem = os.path.splitext(name)[0]
+    suffix = stem[len("products_data"):] if stem.startswith("products_data") else f"_{stem}"
+    return os.path.join(directory, f"catalog_stats{suffix}.json")
+
+
+def save_stats(stats: Dict[str, Any], path: str = STATS_FILE) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as stats_file:
+        json.dump(stats, stats_file, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_stats(path: str = STATS_FILE) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as stats_file:
+        return json.load(stats_file)
@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from supabase import Client, ClientOptions, create_client
+
+from instrumentation import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://vpbjmgwqodhuprpovslh.supabase.co")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY", "sb_publishable_iMCD5saQ85EaP6msbviM2g_XZ9DcV8t")
+CATALOG_TABLE = "products"
+# One row of precomputed aggregates (catalog_stats.compute_stats), written at ingest:
+#   create table catalog_stats (id text primary key, stats jsonb not null, computed_at timestamptz not null);
+STATS_TABLE = "catalog_stats"
+STATS_ROW_ID = "latest"
+# The table only changes when a crawl is uploaded; page views within this many
+# seconds share one query. 0 queries on every view.
+CATALOG_TTL = float(os.environ.get("CATALOG_TTL", "30"))
+# Keep-alive connections per worker process to the Supabase REST API; one per
+# gunicorn thread, so uncached views never queue for a connection.
+POOL_SIZE = int(os.environ.get("GUNICORN_THREADS", "32"))
+QUERY_TIMEOUT = 10.0
+
+
+class CatalogStore:
+    """The products table and its precomputed stats behind one pooled Supabase client per process.
+
+    The client and its keep-alive connection pool are created on first use
+    in each worker (after gunicorn forks) and shared by all request threads.
+    Results are kept for ``ttl`` seconds; when they expire one thread re-queries
+    while concurrent requests wait for its result instead of each querying.
+    If a refresh fails, the last result is served until the next attempt.
+    """
+
+    def __init__(
+        self,
+        url: str = SUPABASE_URL,
+        key: str = SUPABASE_KEY,
+        table: str = CATALOG_TABLE,
+        ttl: float = CATALOG_TTL,
+        pool_size: int = POOL_SIZE,
+        timeout: float = QUERY_TIMEOUT,
+    ):
+        if not url or not key:
+            raise ValueError("Supabase URL and key are required (SUPABASE_URL, SUPABASE_KEY)")
+        self.url = url
+        self.key = key
+        self.table = table
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.client: Optional[Client] = None
+        self.pid: Optional[int] = None
+        # name -> (fetched_at, result)
+        self.results: Dict[str, Tuple[float, Any]] = {}
+        self.queries = 0
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+
+    def connect(self) -> Client:
+        with self.lock:
+            # A client inherited through fork would share sockets with the parent.
+            if self.client is None or self.pid != os.getpid():
+                limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                http = httpx.Client(limits=limits, timeout=self.timeout)
+                options = ClientOptions(httpx_client=http, postgrest_client_timeout=self.timeout)
+                self.client = create_client(self.url, self.key, options)
+                self.pid = os.getpid()
+            return self.client
+
+    def query(self) -> List[dict]:
+        with metrics.timer("query_seconds", table=self.table):
+            rows = self.connect().table(self.table).select("*").execute().data
+        self.queries += 1
+        return rows
+
+    def query_stats(self) -> Optional[dict]:
+        # A single-row primary-key lookup; None until an ingest has written stats.
+        with metrics.timer("query_seconds", table=STATS_TABLE):
+            rows = self.connect().table(STATS_TABLE).select("stats").eq("id", STATS_ROW_ID).limit(1).execute().data
+        self.queries += 1
+        return rows[0]["stats"] if rows else None
+
+    def fresh(self, name: str) -> bool:
+        entry = self.results.get(name)
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def cached(self, name: str, load: Callable[[], Any]) -> Any:
+        if self.ttl <= 0:
+            return load()
+        if self.fresh(name):
+            metrics.cache_result(name, True)
+            return self.results[name][1]
+        with self.refresh_lock:
+            # Another thread may have refreshed while this one waited.
+            if self.fresh(name):
+                metrics.cache_result(name, True)
+                return self.results[name][1]
+            metrics.cache_result(name, False)
+            try:
+                result = load()
+            except Exception as exc:
+                if name not in self.results:
+                    raise
+                fetched_at, result = self.results[name]
+                age = time.monotonic() - fetched_at
+                logger.warning("%s refresh failed, serving data from %.0fs ago: %s", name, age, exc)
+            self.results[name] = (time.monotonic(), result)
+            return result
+
+    def products(self) -> List[dict]:
+        return self.cached("catalog", self.query)
+
+    def stats(self) -> Optional[dict]:
+        return self.cached("catalog_stats", self.query_stats)
+
+    def upsert_products(self, rows: List[dict], on_conflict: str = "Product_URL", batch_size: int = 500) -> None:
+        client = self.connect()
+        for start in range(0, len(rows), batch_size):
+            client.table(self.table).upsert(rows[start:start + batch_size], on_conflict=on_conflict).execute()
+
+    def save_stats(self, stats: dict) -> None:
+        row = {"id": STATS_ROW_ID, "stats": stats, "computed_at": stats["computed_at"]}
+        self.connect().table(STATS_TABLE).upsert(row, on_conflict="id").execute()
@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+
+
+# gunicorn reads this file from the working directory; start.sh also passes it explicitly.
+# Binds to $PORT when it is set (gunicorn's default), otherwise 127.0.0.1:8000.
+
+# Threaded workers: a request waiting on Supabase no longer holds a whole process,
+# so concurrent page views are bounded by workers * threads, not by workers.
+# GUNICORN_WORKER_CLASS=gevent switches to greenlets when gevent is installed.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+# Browsers reuse the connection for the page's follow-up requests.
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
+# Recycle workers now and then so a slow leak cannot grow without bound.
+max_requests = 10000
+max_requests_jitter = 1000
@@ -0,0 +1,354 @@
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RATE = 2.0
+MIN_RATE = 0.2
+MAX_RATE = 20.0
+# Additive increase per successful response, multiplicative decrease on throttling.
+RATE_INCREASE = 0.05
+RATE_DECREASE = 0.5
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+# Longest server-requested Retry-After a worker sleeps through. A longer one
+# returns the throttled response instead of parking the thread.
+MAX_RETRY_AFTER = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+DEFAULT_POOL_SIZE = 10
+# Host pools cached per adapter; keep it above the number of hosts we talk to
+# so pools (and their keep-alive connections) are never evicted mid-run.
+POOL_CONNECTIONS = 16
+# When set, every request is sent to this replay server instead (see replay.py).
+REPLAY_ENV = "SCRAPER_REPLAY_URL"
+REPLAY_HOST_HEADER = "X-Replay-Host"
+# Browser pages are served by the replay server as /static/<host>/<path>.
+REPLAY_STATIC_PREFIX = "/static/"
+
+
+def replay_page_url(url: str, replay_url: Optional[str] = None) -> str:
+    # Where a Selenium driver should load ``url``: the live page, or its
+    # recorded copy when SCRAPER_REPLAY_URL points at a replay server.
+    replay_url = (replay_url if replay_url is not None else os.environ.get(REPLAY_ENV, "")).rstrip("/")
+    if not replay_url:
+        return url
+    parsed = urlparse(url)
+    query = f"?{parsed.query}" if parsed.query else ""
+    return f"{replay_url}{REPLAY_STATIC_PREFIX}{parsed.netloc}{parsed.path or '/'}{query}"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def accept_encoding(decodable: Optional[str] = None) -> str:
+    """Best codec first, offering only what the HTTP library will decode.
+
+    ``decodable`` is a comma-separated codec list; it defaults to urllib3's
+    own, which names br only with a brotli package and zstd only on
+    urllib3 2 with its zstd extra installed.
+    """
+    if decodable is None:
+        from urllib3.util.request import ACCEPT_ENCODING as decodable
+    supported = {codec.strip() for codec in decodable.split(",")}
+    return ", ".join(codec for codec in ("zstd", "br", "gzip", "deflate") if codec in supported)
+
+
+def read_json(response: Any) -> Any:
+    # The stdlib parser needs the whole document, so the body is read (and
+    # decompressed) in full first; this is the one place listing and search
+    # payloads are decoded.
+    return response.json()
+
+
+def build_session(
+    headers: Optional[Dict[str, str]] = None,
+    pool_sizes: Optional[Dict[str, int]] = None,
+    default_pool_size: int = DEFAULT_POOL_SIZE,
+) -> requests.Session:
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = accept_encoding()
+    if headers:
+        session.headers.update(headers)
+
+    default_adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=default_pool_size)
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+    for host, size in (pool_sizes or {}).items():
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=max(1, size))
+        session.mount(f"https://{host}/", adapter)
+        session.mount(f"http://{host}/", adapter)
+    return session
+
+
+def session_connection_stats(session: requests.Session) -> Dict[str, Dict[str, Any]]:
+    stats: Dict[str, Dict[str, Any]] = {}
+    seen: Set[int] = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen or not isinstance(adapter, HTTPAdapter):
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # num_connections counts new sockets (TCP + TLS handshakes);
+            # num_requests counts every request sent through the pool.
+            entry = stats.setdefault(pool.host, {"connections": 0, "requests": 0, "pool_maxsize": 0})
+            entry["connections"] += pool.num_connections
+            entry["requests"] += pool.num_requests
+            entry["pool_maxsize"] = max(entry["pool_maxsize"], pool.pool.maxsize if pool.pool else 0)
+
+    for entry in stats.values():
+        requests_sent = entry["requests"]
+        entry["reuse_ratio"] = round(1 - entry["connections"] / requests_sent, 3) if requests_sent else 0.0
+    return stats
+
+
+class Http2Session:
+    """requests-like facade over an httpx client with HTTP/2 multiplexing.
+
+    Needs ``httpx`` with the ``h2`` extra. Only the parts of the requests
+    API that HttpClient and the replay Recorder use are provided, including
+    ``hooks["response"]``.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, max_connections: int = DEFAULT_POOL_SIZE):
+        import httpcore
+        import httpx
+        from httpx._decoders import SUPPORTED_DECODERS
+
+        self._httpcore = httpcore
+        self._httpx = httpx
+        self.client = httpx.Client(
+            http2=True,
+            headers=dict({"Accept-Encoding": accept_encoding(",".join(SUPPORTED_DECODERS))}, **(headers or {})),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.headers = self.client.headers
+        # Called like requests hooks: hook(response) may return a replacement.
+        self.hooks: Dict[str, List[Callable[..., Any]]] = {"response": []}
+        self.lock = threading.Lock()
+        self.connection_ids: Dict[str, Set[int]] = {}
+        self.request_counts: Dict[str, int] = {}
+        self.http_versions: Dict[str, str] = {}
+
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        data = kwargs.pop("data", None)
+        if isinstance(data, (str, bytes)):
+            kwargs["content"] = data
+        elif data is not None:
+            kwargs["data"] = data
+        kwargs.pop("stream", None)
+        try:
+            response = self.client.request(method, url, **kwargs)
+        except self._httpx.TimeoutException as exc:
+            raise requests.Timeout(str(exc)) from exc
+        except self._httpx.TransportError as exc:
+            raise requests.ConnectionError(str(exc)) from exc
+
+        url = response.request.url
+        origin = self._httpcore.Origin(url.raw_scheme, url.raw_host, url.port or (443 if url.scheme == "https" else 80))
+        pool = getattr(self.client._transport, "_pool", None)
+        with self.lock:
+            self.request_counts[url.host] = self.request_counts.get(url.host, 0) + 1
+            self.http_versions[url.host] = response.http_version
+            ids = self.connection_ids.setdefault(url.host, set())
+            # Each distinct pooled connection to the origin is one handshake.
+            for connection in getattr(pool, "connections", []):
+                if connection.can_handle_request(origin):
+                    ids.add(id(connection))
+        for hook in self.hooks.get("response", []):
+            response = hook(response) or response
+        return response
+
+    def connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats: Dict[str, Dict[str, Any]] = {}
+        with self.lock:
+            for host, count in self.request_counts.items():
+                connections = len(self.connection_ids.get(host, ()))
+                stats[host] = {
+                    "connections": connections,
+                    "requests": count,
+                    "http_version": self.http_versions.get(host, ""),
+                    "reuse_ratio": round(1 - connections / count, 3) if count else 0.0,
+                }
+        return stats
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class TokenBucket:
+    def __init__(self, rate: float = DEFAULT_RATE, min_rate: float = MIN_RATE, max_rate: float = MAX_RATE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.capacity = max(1.0, rate)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = max(self.blocked_until - now, (1.0 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+            self.capacity = max(1.0, self.rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * RATE_DECREASE)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+
+class HttpClient:
+    """Shared request layer: per-host token buckets with AIMD pacing and retries.
+
+    Throttling responses (429/503) halve the host's rate and honour Retry-After
+    up to MAX_RETRY_AFTER; every success nudges it back up. Transient failures are retried with
+    full-jitter exponential backoff before the last response is returned.
+    """
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        host_rates: Optional[Dict[str, float]] = None,
+        default_rate: float = DEFAULT_RATE,
+        max_retries: int = MAX_RETRIES,
+        replay_url: Optional[str] = None,
+    ):
+        self.session = session or requests.Session()
+        self.replay_url = (replay_url if replay_url is not None else os.environ.get(REPLAY_ENV, "")).rstrip("/")
+        self.host_rates = dict(host_rates or {})
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.host_rates.get(host, self.default_rate))
+                self.buckets[host] = bucket
+            return bucket
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    def to_replay(self, url: str, kwargs: dict) -> str:
+        parsed = urlparse(url)
+        headers = dict(kwargs.get("headers") or {})
+        headers[REPLAY_HOST_HEADER] = parsed.netloc
+        kwargs["headers"] = headers
+        return self.replay_url + (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+
+    def record(self, host: str, response: Any, elapsed: float, streamed: bool) -> None:
+        metrics.observe("http_request_seconds", elapsed, host=host)
+        metrics.inc("http_requests_total", host=host, status=response.status_code)
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit():
+            metrics.inc("http_response_bytes_total", int(length), host=host)
+        elif not streamed:
+            metrics.inc("http_response_bytes_total", len(response.content), host=host)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        bucket = self.bucket(url)
+        host = urlparse(url).netloc.lower()
+        if self.replay_url:
+            url = self.to_replay(url, kwargs)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                metrics.inc("http_errors_total", host=host, error=exc.__class__.__name__)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                reason = exc.__class__.__name__
+                logger.info("Retrying %s after %s (%.1fs)", url, reason, delay)
+            else:
+                self.record(host, response, time.perf_counter() - started, bool(kwargs.get("stream")))
+                if response.status_code not in RETRY_STATUSES:
+                    bucket.on_success()
+                    return response
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code in THROTTLE_STATUSES:
+                    bucket.on_throttle(min(retry_after, MAX_RETRY_AFTER) if retry_after is not None else None)
+                if attempt >= self.max_retries:
+                    return response
+                if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                    logger.warning("Giving up on %s: Retry-After of %.0fs exceeds %.0fs", url, retry_after, MAX_RETRY_AFTER)
+                    metrics.inc("http_retry_after_exceeded_total", host=host)
+                    return response
+                delay = retry_after if retry_after is not None else self.backoff(attempt)
+                reason = str(response.status_code)
+                logger.info("Retrying %s after status %s (%.1fs)", url, response.status_code, delay)
+                response.close()
+
+            metrics.inc("http_retries_total", host=host, reason=reason)
+            with self.lock:
+                self.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        if isinstance(self.session, Http2Session):
+            return self.session.connection_stats()
+        return session_connection_stats(self.session)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
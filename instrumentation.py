@@ -0,0 +1,211 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds; covers a fast cache hit up to a slow PDP download.
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+METRICS_PORT = 9108
+SERVER_THREAD = "metrics-server"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class Metrics:
+    """Process-wide counters and histograms for one crawl.
+
+    Names follow Prometheus conventions (``*_total`` counters, ``*_seconds``
+    histograms) so the same data can be dumped as JSON or scraped.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.lock = threading.Lock()
+        # Stage stacks keyed by thread id so a sampling profiler can read them.
+        self.thread_stages: Dict[int, List[str]] = {}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.started = time.time()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def cache_result(self, cache: str, hit: bool) -> None:
+        self.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def current_stage(self) -> str:
+        return self.stage_of(threading.get_ident())
+
+    def stage_of(self, thread_id: int) -> str:
+        stack = self.thread_stages.get(thread_id)
+        if not stack:
+            # Pool threads work on behalf of whatever stage the main thread is in.
+            main = threading.main_thread().ident
+            stack = self.thread_stages.get(main) if thread_id != main else None
+        return stack[-1] if stack else ""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        ident = threading.get_ident()
+        stack = self.thread_stages.setdefault(ident, [])
+        stack.append(name)
+        try:
+            with self.timer("stage_seconds", stage=name):
+                yield
+        finally:
+            stack.pop()
+            if not stack:
+                self.thread_stages.pop(ident, None)
+
+    def to_dict(self) -> dict:
+        uptime = time.time() - self.started
+        with self.lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            }
+            histograms = {
+                name: [{"labels": dict(key), **histogram.to_dict()} for key, histogram in series.items()]
+                for name, series in self.histograms.items()
+            }
+
+        rates = {}
+        for entry in counters.get("items_total", []):
+            stage = entry["labels"].get("stage", "")
+            spent = sum(
+                h["sum"] for h in histograms.get("stage_seconds", []) if h["labels"].get("stage") == stage
+            )
+            rates[stage] = round(entry["value"] / (spent or uptime), 3) if (spent or uptime) else 0.0
+
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "items_per_second": rates,
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
+        logger.info("Saved run metrics to %s", path)
+
+    def prometheus_text(self) -> str:
+        def fmt(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = list(labels) + ([extra] if extra else [])
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines: List[str] = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{fmt(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + [float("inf")], histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else str(bound)
+                        lines.append(f"{name}_bucket{fmt(key, ('le', le))} {cumulative}")
+                    lines.append(f"{name}_sum{fmt(key)} {histogram.total}")
+                    lines.append(f"{name}_count{fmt(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = METRICS_PORT) -> "ThreadingHTTPServer":
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.rstrip("/") == "/metrics.json":
+                    body = json.dumps(registry.to_dict()).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    body = registry.prometheus_text().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=SERVER_THREAD, daemon=True).start()
+        logger.info("Serving metrics on http://127.0.0.1:%s/metrics", server.server_address[1])
+        return server
+
+
+metrics = Metrics()
@@ -0,0 +1,102 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_field_rules.json")
+# Card lines repeat heavily ("Permanent contract", "New York"); remember their fields.
+LINE_CACHE_SIZE = 65536
+
+
+@dataclass
+class FieldRule:
+    field: str
+    keywords: List[str] = field(default_factory=list)
+    case_sensitive: bool = False
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FieldRule":
+        return cls(
+            field=data["field"],
+            keywords=list(data.get("keywords", [])),
+            case_sensitive=bool(data.get("case_sensitive", False)),
+        )
+
+
+def load_rules(path: str = RULES_FILE) -> List[FieldRule]:
+    with open(path, encoding="utf-8") as rules_file:
+        config = json.load(rules_file)
+    return [FieldRule.from_dict(item) for item in config.get("rules", [])]
+
+
+class LineClassifier:
+    """Classifies job card lines against every keyword rule in one regex scan.
+
+    Each rule becomes a numbered group of one alternation, so a single
+    ``finditer`` over the line reports every field it mentions. Rules keep
+    their file order as priority; keywords match at the start of a word.
+    """
+
+    def __init__(self, rules: List[FieldRule]):
+        self.rules = [rule for rule in rules if rule.keywords]
+        self.fields = [rule.field for rule in self.rules]
+        groups = []
+        for rule in self.rules:
+            # Longest keyword first so alternation prefers the most specific wording.
+            alternation = "|".join(re.escape(k) for k in sorted(rule.keywords, key=len, reverse=True))
+            # Keywords match at word starts: "ago" must not fire inside "Chicago".
+            groups.append(rf"(\b(?:{alternation}))" if rule.case_sensitive else rf"(\b(?i:{alternation}))")
+        self.pattern = re.compile("|".join(groups)) if groups else None
+        self.cache: Dict[str, Tuple[str, ...]] = {}
+        # Matched-group bitmask -> fields in priority order.
+        self.combinations: Dict[int, Tuple[str, ...]] = {}
+
+    def classify(self, line: str) -> Tuple[str, ...]:
+        fields = self.cache.get(line)
+        if fields is not None:
+            return fields
+        if self.pattern is None:
+            return ()
+
+        mask = 0
+        for match in self.pattern.finditer(line):
+            mask |= 1 << match.lastindex
+        fields = self.combinations.get(mask)
+        if fields is None:
+            fields = tuple(dict.fromkeys(
+                name for index, name in enumerate(self.fields, 1) if mask >> index & 1
+            ))
+            self.combinations[mask] = fields
+
+        if len(self.cache) >= LINE_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[line] = fields
+        return fields
+
+    def assign(
+        self,
+        job: Dict[str, str],
+        lines: Iterable[str],
+        transforms: Optional[Dict[str, Callable[[str], str]]] = None,
+        exclusive: bool = True,
+    ) -> Dict[str, str]:
+        # exclusive: a line fills at most one field (the first still empty);
+        # otherwise it fills every empty field it matches.
+        transforms = transforms or {}
+        for line in lines:
+            for name in self.classify(line):
+                if job.get(name):
+                    continue
+                transform = transforms.get(name)
+                job[name] = transform(line) if transform else line
+                if exclusive:
+                    break
+        return job
+
+
+@lru_cache(maxsize=None)
+def load_classifier(path: str = RULES_FILE) -> LineClassifier:
+    return LineClassifier(load_rules(path))
@@ -0,0 +1,241 @@
+import argparse
+import json
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from jungle_search_api import CONTRACT_TYPES, JOB_HEADERS, REMOTE_TYPES
+
+
+CSV_CHUNK_ROWS = 500_000
+EMPLOYEE_THRESHOLD = 200
+RECENT_HOURS = 24
+NEW_YORK = "new york"
+
+JOB_TYPE_CATEGORIES = list(dict.fromkeys(CONTRACT_TYPES.values()))
+WORK_LOCATION_CATEGORIES = list(REMOTE_TYPES.values())
+REMOTE_CATEGORIES = ["Fully-remote", "Hybrid", "Occasional remote"]
+
+# First matching keyword wins, so more specific wordings come first. Keywords
+# match whole words (plural allowed), so "vie" is not found in "interview".
+JOB_TYPE_KEYWORDS = [
+    ("permanent", "Permanent contract"),
+    ("cdi", "Permanent contract"),
+    ("full-time", "Permanent contract"),
+    ("full time", "Permanent contract"),
+    ("internship", "Internship"),
+    ("intern", "Internship"),
+    ("stage", "Internship"),
+    ("apprenticeship", "Work study"),
+    ("apprentice", "Work study"),
+    ("work study", "Work study"),
+    ("alternance", "Work study"),
+    ("fixed-term", "Temporary"),
+    ("temporary", "Temporary"),
+    ("cdd", "Temporary"),
+    ("freelance", "Freelance"),
+    ("part-time", "Part-time"),
+    ("part time", "Part-time"),
+    ("graduate", "Graduate program"),
+    ("volunteer", "Volunteer"),
+    ("vie", "VIE"),
+    ("idv", "IDV"),
+]
+WORK_LOCATION_KEYWORDS = [
+    ("no remote", "On-site"),
+    ("on-site", "On-site"),
+    ("onsite", "On-site"),
+    ("occasional", "Occasional remote"),
+    ("punctual", "Occasional remote"),
+    ("hybrid", "Hybrid"),
+    ("partial", "Hybrid"),
+    ("remote", "Fully-remote"),
+]
+
+AGE_PATTERN = re.compile(r"(\d+|an?|one)\s*(minute|hour|day|week|month|year)s?\b")
+AGE_UNIT_HOURS = {"minute": 1 / 60, "hour": 1, "day": 24, "week": 24 * 7, "month": 24 * 30, "year": 24 * 365}
+EMPLOYEES_PATTERN = re.compile(r"\d[\d,\s]*")
+
+JobSource = Union[pd.DataFrame, Sequence[Dict[str, str]]]
+
+
+def parse_employees(text: str) -> float:
+    match = EMPLOYEES_PATTERN.search(text)
+    if not match:
+        return np.nan
+    digits = re.sub(r"[,\s]", "", match.group())
+    return float(digits) if digits else np.nan
+
+
+def parse_posted_hours(text: str) -> float:
+    text = text.strip().lower()
+    if not text:
+        return np.nan
+    if text in ("today", "just now", "now"):
+        return 0.0
+    if text == "yesterday":
+        return 24.0
+    match = AGE_PATTERN.search(text)
+    if not match:
+        return np.nan
+    amount = 1 if match.group(1) in ("a", "an", "one") else int(match.group(1))
+    return amount * AGE_UNIT_HOURS[match.group(2)]
+
+
+def keyword_category(rules: List[tuple], default: Optional[str] = None) -> Callable[[str], Optional[str]]:
+    patterns = [(re.compile(rf"\b{re.escape(keyword)}s?\b"), category) for keyword, category in rules]
+
+    def classify(text: str) -> Optional[str]:
+        lowered = text.strip().lower()
+        if not lowered:
+            return None
+        for pattern, category in patterns:
+            if pattern.search(lowered):
+                return category
+        return default
+
+    return classify
+
+
+def map_distinct(values: pd.Series, func: Callable[[str], object], dtype: object = object) -> np.ndarray:
+    # Parse each distinct string once and broadcast by code: scraped columns
+    # repeat a handful of values across millions of rows. Missing values get
+    # code -1, which picks the trailing entry parsed from "".
+    codes, uniques = pd.factorize(values, sort=False)
+    parsed = np.array([func(str(value)) for value in uniques] + [func("")], dtype=dtype)
+    return parsed[codes]
+
+
+def prepare_jobs(jobs: JobSource) -> pd.DataFrame:
+    """Parse raw scraped job rows into typed columns, once.
+
+    Text fields become categoricals, ``employees`` a float (NaN when
+    unknown) and ``posted_hours`` the listing age in hours.
+    """
+    raw = jobs if isinstance(jobs, pd.DataFrame) else pd.DataFrame(list(jobs), columns=JOB_HEADERS)
+    raw = raw.reindex(columns=JOB_HEADERS)
+
+    return pd.DataFrame({
+        "company": raw["Company_Title"].astype("category"),
+        "location": raw["Location"].astype("category"),
+        "job_type": pd.Categorical(
+            map_distinct(raw["Job_Type"], keyword_category(JOB_TYPE_KEYWORDS, default="Other")),
+            categories=JOB_TYPE_CATEGORIES,
+        ),
+        "work_location": pd.Categorical(
+            map_distinct(raw["Work_Location"], keyword_category(WORK_LOCATION_KEYWORDS)),
+            categories=WORK_LOCATION_CATEGORIES,
+        ),
+        "employees": map_distinct(raw["Employes_Count"], parse_employees, dtype=float),
+        "posted_hours": map_distinct(raw["Posted_Ago"], parse_posted_hours, dtype=float),
+    })
+
+
+def category_counts(column: pd.Series, skip_blank: bool = True) -> pd.Series:
+    counts = column.value_counts(sort=False)
+    counts.index = counts.index.astype(str)
+    if skip_blank:
+        counts = counts[counts.index != ""]
+    return counts[counts > 0]
+
+
+class JobStats:
+    """Running totals for the challenge questions.
+
+    ``update`` folds in one prepared frame (or CSV chunk) with a single
+    vectorized pass per column; ``answers`` reads the totals back out.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.new_york = 0
+        self.recent = 0
+        self.remote = 0
+        self.fully_remote = 0
+        self.with_employees = 0
+        self.more_than_threshold = 0
+        self.less_than_threshold = 0
+        self.companies = pd.Series(dtype="int64")
+        self.locations = pd.Series(dtype="int64")
+        self.job_types = pd.Series(dtype="int64")
+        self.work_locations = pd.Series(dtype="int64")
+
+    def update(self, prepared: pd.DataFrame) -> "JobStats":
+        employees = prepared["employees"].to_numpy()
+        hours = prepared["posted_hours"].to_numpy()
+        locations = prepared["location"]
+        # Substring test once per distinct location, then count by category code.
+        new_york = np.asarray(locations.cat.categories.str.lower().str.contains(NEW_YORK, regex=False))
+        codes = locations.cat.codes.to_numpy()
+
+        self.total += len(prepared)
+        self.new_york += int(new_york[codes[codes >= 0]].sum())
+        self.recent += int((hours <= RECENT_HOURS).sum())
+        self.remote += int(prepared["work_location"].isin(REMOTE_CATEGORIES).sum())
+        self.fully_remote += int((prepared["work_location"] == "Fully-remote").sum())
+        self.with_employees += int((~np.isnan(employees)).sum())
+        self.more_than_threshold += int((employees > EMPLOYEE_THRESHOLD).sum())
+        self.less_than_threshold += int((employees < EMPLOYEE_THRESHOLD).sum())
+
+        self.companies = self.companies.add(category_counts(prepared["company"]), fill_value=0)
+        self.locations = self.locations.add(category_counts(locations), fill_value=0)
+        self.job_types = self.job_types.add(category_counts(prepared["job_type"]), fill_value=0)
+        self.work_locations = self.work_locations.add(category_counts(prepared["work_location"]), fill_value=0)
+        return self
+
+    @staticmethod
+    def top(counts: pd.Series) -> Optional[Dict[str, object]]:
+        if counts.empty:
+            return None
+        # Ties break alphabetically so repeated runs agree.
+        ordered = counts.sort_index().sort_values(ascending=False, kind="stable")
+        return {"name": ordered.index[0], "jobs": int(ordered.iloc[0])}
+
+    def answers(self) -> Dict[str, object]:
+        return {
+            "total_jobs": self.total,
+            "new_york_jobs": self.new_york,
+            "more_than_200_employees": self.more_than_threshold,
+            "less_than_200_employees": self.less_than_threshold,
+            "permanent_contract_jobs": int(self.job_types.get("Permanent contract", 0)),
+            "internship_jobs": int(self.job_types.get("Internship", 0)),
+            "posted_last_24_hours": self.recent,
+            "remote_jobs": self.remote,
+            "fully_remote_jobs": self.fully_remote,
+            "top_company": self.top(self.companies),
+            "top_job_type": self.top(self.job_types),
+            "top_location": self.top(self.locations),
+            "with_employee_count": self.with_employees,
+            "with_employee_count_pct": round(self.with_employees / self.total * 100, 1) if self.total else 0.0,
+            "job_types": {name: int(count) for name, count in self.job_types.items()},
+            "work_locations": {name: int(count) for name, count in self.work_locations.items()},
+        }
+
+
+def answer_questions(jobs: JobSource) -> Dict[str, object]:
+    return JobStats().update(prepare_jobs(jobs)).answers()
+
+
+def answer_questions_from_csv(paths: Iterable[str], chunksize: int = CSV_CHUNK_ROWS) -> Dict[str, object]:
+    # Streams any number of results files in fixed-size chunks, so memory stays
+    # flat however many aggregated rows there are.
+    stats = JobStats()
+    for path in paths:
+        for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize):
+            stats.update(prepare_jobs(chunk))
+    return stats.answers()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Answer the job market questions from results CSV files")
+    parser.add_argument("paths", nargs="*", default=["results.csv"])
+    parser.add_argument("--chunksize", type=int, default=CSV_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    print(json.dumps(answer_questions_from_csv(args.paths, args.chunksize), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
+
+from http_client import HttpClient, build_session
+from instrumentation import metrics
+from jungle_enrichment import COMPANY_CACHE_FILE, CompanyCache, JobDetailEnricher
+from jungle_search_api import HEADERS, JOB_HEADERS, SEARCH_RATE, JungleSearchClient
+from profiler import profiled
+from seen_set import SeenSet, add_seen_arguments, seen_set_from_args
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_QUERIES = ["Business"]
+DEFAULT_COUNTRIES = ["US"]
+CRAWL_WORKERS = 6
+
+
+def canonical_job_link(link: str) -> str:
+    if not link:
+        return ""
+    parsed = urlparse(link.strip())
+    path = parsed.path.rstrip("/")
+    # /fr/companies/x/jobs/y and /en/companies/x/jobs/y are the same posting.
+    parts = path.split("/")
+    if len(parts) > 2 and len(parts[1]) == 2 and parts[2] == "companies":
+        parts[1] = "en"
+        path = "/".join(parts)
+    return urlunparse(("https", parsed.netloc.lower(), path, "", "", ""))
+
+
+class JobCrawlScheduler:
+    def __init__(
+        self,
+        queries: Iterable[str] = DEFAULT_QUERIES,
+        countries: Iterable[str] = DEFAULT_COUNTRIES,
+        workers: int = CRAWL_WORKERS,
+        language: str = "en",
+        seen: Optional[SeenSet] = None,
+    ):
+        self.tasks: List[Tuple[str, str]] = [(q, c) for q in queries for c in countries]
+        self.workers = workers
+        self.language = language
+        self.jobs: Dict[str, Dict[str, str]] = {}
+        self.duplicates = 0
+        # Links crawled in earlier runs; jobs found there are skipped, not exported again.
+        self.seen = seen
+        self.known = 0
+        self.failed: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._discovered: Optional[JungleSearchClient] = None
+        # One request layer for all workers so the per-host rate budget is shared,
+        # with a pool large enough that no worker opens a throwaway connection.
+        session = build_session(HEADERS, default_pool_size=workers + 2)
+        self.http = HttpClient(session, default_rate=SEARCH_RATE)
+
+    def make_client(self) -> JungleSearchClient:
+        # Discover the index once; workers reuse its parameters.
+        if self._discovered is None:
+            self._discovered = JungleSearchClient(language=self.language, http=self.http)
+            self._discovered.discover()
+        base = self._discovered
+        return JungleSearchClient(
+            language=self.language,
+            app_id=base.app_id,
+            api_key=base.api_key,
+            index_name=base.index_name,
+            http=self.http,
+        )
+
+    def crawl_one(self, query: str, country: str) -> List[Dict[str, str]]:
+        started = time.perf_counter()
+        jobs = self.make_client().search(query, country)
+        logger.info("Query %r / %s: %s jobs in %.1fs", query, country or "*", len(jobs), time.perf_counter() - started)
+        return jobs
+
+    def merge(self, jobs: List[Dict[str, str]]) -> int:
+        added = 0
+        with self._lock:
+            for job in jobs:
+                link = canonical_job_link(job.get("Job_Link", ""))
+                if not link:
+                    continue
+                if link in self.jobs:
+                    self.duplicates += 1
+                    existing = self.jobs[link]
+                    for key, value in job.items():
+                        if value and not existing.get(key):
+                            existing[key] = value
+                    continue
+                # Links become seen in save_to_csv, once they are in the output.
+                if self.seen is not None and link in self.seen:
+                    self.known += 1
+                    continue
+                job["Job_Link"] = link
+                self.jobs[link] = job
+                added += 1
+        metrics.inc("items_total", added, stage="jungle_crawl")
+        metrics.inc("duplicates_total", len(jobs) - added, stage="jungle_crawl")
+        return added
+
+    def run(self) -> List[Dict[str, str]]:
+        started = time.perf_counter()
+        self.make_client()
+
+        with metrics.stage("jungle_crawl"), ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.crawl_one, q, c): (q, c) for q, c in self.tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    added = self.merge(future.result())
+                except Exception as exc:
+                    logger.warning("Query %r / %s failed: %s", task[0], task[1], exc)
+                    self.failed.append(task)
+                    continue
+                logger.info("Merged %s new jobs from %r / %s (total %s)", added, task[0], task[1], len(self.jobs))
+
+        logger.info(
+            "Crawled %s queries in %.1fs: %s unique jobs, %s duplicates, %s seen before, %s failed",
+            len(self.tasks),
+            time.perf_counter() - started,
+            len(self.jobs),
+            self.duplicates,
+            self.known,
+            len(self.failed),
+        )
+        logger.info("Connection reuse: %s", self.http.connection_stats())
+        return list(self.jobs.values())
+
+    def save_to_csv(self, filename: str = "results.csv") -> None:
+        # With a persistent seen-set, self.jobs holds only jobs no earlier run
+        # saw, so they are appended and the file keeps every job crawled so far.
+        append = self.seen is not None and os.path.exists(filename) and os.path.getsize(filename) > 0
+        with open(filename, "a" if append else "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=JOB_HEADERS, extrasaction="ignore")
+            if not append:
+                writer.writeheader()
+            writer.writerows(self.jobs.values())
+        logger.info("%s %s jobs to %s", "Appended" if append else "Saved", len(self.jobs), filename)
+        if self.seen is not None:
+            self.seen.update(self.jobs)
+
+
+def load_crawl_config(path: str) -> dict:
+    with open(path, encoding="utf-8") as config_file:
+        return json.load(config_file)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawl Welcome to the Jungle for many queries and countries")
+    parser.add_argument("--config", help="JSON file with 'queries' and 'countries' lists")
+    parser.add_argument("--queries", nargs="*", help="Search queries")
+    parser.add_argument("--countries", nargs="*", help="Office country codes, e.g. US FR")
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS)
+    parser.add_argument("--output", default="results.csv")
+    parser.add_argument("--metrics-file", default="metrics_jungle.json")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port during the run")
+    parser.add_argument("--profile", action="store_true", help="Write profile_jungle.folded/.json next to the output CSV")
+    parser.add_argument("--enrich", action="store_true", help="Fill Company_Slogan/Industry from job and company pages")
+    parser.add_argument("--company-cache", default=COMPANY_CACHE_FILE, help="Company metadata cache file")
+    add_seen_arguments(parser)
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    config = load_crawl_config(args.config) if args.config else {}
+    queries = args.queries or config.get("queries") or DEFAULT_QUERIES
+    countries = args.countries or config.get("countries") or DEFAULT_COUNTRIES
+
+    profile_file = os.path.join(os.path.dirname(args.output), "profile_jungle") if args.profile else None
+    # Only a persisted seen-set adds anything over the in-run merge.
+    seen = seen_set_from_args(args) if args.seen_file else None
+    scheduler = JobCrawlScheduler(queries, countries, workers=args.workers, seen=seen)
+    try:
+        with profiled(profile_file):
+            jobs = scheduler.run()
+            if args.enrich:
+                JobDetailEnricher(CompanyCache(args.company_cache)).enrich(jobs)
+            with metrics.stage("export"):
+                scheduler.save_to_csv(args.output)
+    finally:
+        if seen is not None:
+            seen.close()
+        metrics.write_json(args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
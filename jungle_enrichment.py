@@ -0,0 +1,230 @@
+import html
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from http_client import RETRY_STATUSES, HttpClient, build_session
+from instrumentation import metrics
+from jungle_search_api import HEADERS, SITE_URL
+from ttl_cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+DETAIL_WORKERS = 6
+DETAIL_RATE = 4.0
+COMPANY_TTL = 24 * 3600
+COMPANY_CACHE_SIZE = 10000
+COMPANY_CACHE_FILE = "company_cache.json"
+ENRICHED_FIELDS = ["Company_Slogan", "Industry", "Employes_Count"]
+
+JSON_LD_PATTERN = re.compile(
+    r"<script[^>]+type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>", re.S | re.I
+)
+META_PATTERN = re.compile(r"<meta\s+[^>]*>", re.I)
+ATTR_PATTERN = re.compile(r"([\w:-]+)\s*=\s*[\"']([^\"']*)[\"']")
+
+
+def company_slug(job_link: str) -> str:
+    # /en/companies/<slug>/jobs/<job-slug>
+    parts = urlparse(job_link).path.strip("/").split("/")
+    if "companies" in parts:
+        index = parts.index("companies")
+        if index + 1 < len(parts):
+            return parts[index + 1]
+    return ""
+
+
+def json_ld_objects(page: str) -> List[dict]:
+    objects: List[dict] = []
+    for block in JSON_LD_PATTERN.findall(page):
+        try:
+            data = json.loads(html.unescape(block.strip()))
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            data = data.get("@graph", [data])
+        if isinstance(data, list):
+            objects.extend(item for item in data if isinstance(item, dict))
+    return objects
+
+
+def meta_content(page: str) -> Dict[str, str]:
+    content: Dict[str, str] = {}
+    for tag in META_PATTERN.findall(page):
+        attrs = {key.lower(): value for key, value in ATTR_PATTERN.findall(tag)}
+        name = attrs.get("property") or attrs.get("name")
+        if name and "content" in attrs:
+            content.setdefault(name.lower(), html.unescape(attrs["content"]).strip())
+    return content
+
+
+def as_text(value: object) -> str:
+    if isinstance(value, list):
+        return " | ".join(dict.fromkeys(as_text(item) for item in value if as_text(item)))
+    if isinstance(value, dict):
+        return as_text(value.get("name") or value.get("value") or "")
+    return str(value).strip() if value is not None else ""
+
+
+def parse_job_page(page: str) -> Dict[str, str]:
+    # Job pages carry a schema.org JobPosting; the hiring organization is nested in it.
+    for item in json_ld_objects(page):
+        if item.get("@type") != "JobPosting":
+            continue
+        organization = item.get("hiringOrganization") or {}
+        return {
+            "Industry": as_text(item.get("industry") or organization.get("industry")),
+            "Company_Slogan": as_text(organization.get("slogan") or organization.get("description")),
+        }
+    return {}
+
+
+def parse_company_page(page: str) -> Dict[str, str]:
+    details = {"Company_Slogan": "", "Industry": "", "Employes_Count": ""}
+    for item in json_ld_objects(page):
+        if item.get("@type") not in ("Organization", "Corporation", "LocalBusiness"):
+            continue
+        details["Company_Slogan"] = as_text(item.get("slogan") or item.get("description"))
+        details["Industry"] = as_text(item.get("industry") or item.get("knowsAbout"))
+        employees = item.get("numberOfEmployees")
+        if isinstance(employees, dict):
+            employees = employees.get("value") or employees.get("minValue")
+        details["Employes_Count"] = as_text(employees)
+        break
+
+    if not details["Company_Slogan"]:
+        meta = meta_content(page)
+        details["Company_Slogan"] = meta.get("og:description") or meta.get("description") or ""
+    return details
+
+
+class CompanyCache(TTLCache):
+    """Company metadata by slug; see ``TTLCache``."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = COMPANY_TTL, max_entries: int = COMPANY_CACHE_SIZE):
+        super().__init__("company", path, ttl, max_entries)
+
+
+class JobDetailEnricher:
+    """Fills Company_Slogan, Industry and missing employee counts from detail pages.
+
+    Job pages are fetched with bounded concurrency. Company pages go through
+    the slug cache, and concurrent jobs of the same company share one
+    in-flight request.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[CompanyCache] = None,
+        workers: int = DETAIL_WORKERS,
+        http: Optional[HttpClient] = None,
+        language: str = "en",
+    ):
+        self.cache = cache or CompanyCache()
+        self.workers = workers
+        self.language = language
+        if http is None:
+            session = build_session(HEADERS, default_pool_size=workers + 2)
+            http = HttpClient(session, host_rates={urlparse(SITE_URL).netloc: DETAIL_RATE})
+        self.http = http
+        self.inflight: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.company_fetches = 0
+        self.job_fetches = 0
+
+    def fetch_page(self, url: str) -> Optional[str]:
+        # "" for pages that do not exist, None when the site failed (worth retrying later).
+        response = self.http.get(url, timeout=30)
+        if response.status_code != 200:
+            response.close()
+            return None if response.status_code in RETRY_STATUSES else ""
+        return response.text
+
+    def company_details(self, slug: str) -> Dict[str, str]:
+        details = self.cache.get(slug)
+        if details is not None:
+            return details
+
+        with self.lock:
+            # Another worker may have stored it between the miss above and here.
+            details = self.cache.get(slug, record=False)
+            if details is not None:
+                return details
+            future = self.inflight.get(slug)
+            owner = future is None
+            if owner:
+                future = self.inflight[slug] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            page = self.fetch_page(f"{SITE_URL}/{self.language}/companies/{slug}")
+            with metrics.timer("parse_seconds", kind="company_page"):
+                details = parse_company_page(page) if page else {}
+            with self.lock:
+                self.company_fetches += 1
+            if page is not None:
+                # Missing companies are cached too, so their jobs do not refetch them.
+                self.cache.put(slug, details)
+            future.set_result(details)
+            return details
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(slug, None)
+
+    def enrich_job(self, job: Dict[str, str]) -> Dict[str, str]:
+        link = job.get("Job_Link", "")
+        if not link:
+            return job
+
+        if not job.get("Industry") or not job.get("Company_Slogan"):
+            page = self.fetch_page(link)
+            with self.lock:
+                self.job_fetches += 1
+            with metrics.timer("parse_seconds", kind="job_page"):
+                details = parse_job_page(page) if page else {}
+            for key, value in details.items():
+                if value and not job.get(key):
+                    job[key] = value
+
+        slug = company_slug(link)
+        if slug and any(not job.get(key) for key in ENRICHED_FIELDS):
+            for key, value in self.company_details(slug).items():
+                if value and not job.get(key):
+                    job[key] = value
+        return job
+
+    def enrich(self, jobs: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        started = time.perf_counter()
+        pending = [job for job in jobs if any(not job.get(key) for key in ENRICHED_FIELDS)]
+
+        def enrich_one(job: Dict[str, str]) -> None:
+            try:
+                self.enrich_job(job)
+                metrics.inc("items_total", stage="jungle_enrichment")
+            except Exception as exc:
+                logger.warning("Could not enrich %s: %s", job.get("Job_Link"), exc)
+
+        with metrics.stage("jungle_enrichment"), ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(enrich_one, pending))
+
+        self.cache.save()
+        logger.info(
+            "Enriched %s/%s jobs in %.1fs (%s job pages, %s company pages fetched)",
+            len(pending),
+            len(jobs),
+            time.perf_counter() - started,
+            self.job_fetches,
+            self.company_fetches,
+        )
+        return jobs
@@ -1,5 +1,6 @@
 
 
+import argparse
 import csv
 import logging
 import time
@@ -14,6 +15,13 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.keys import Keys
 from webdriver_manager.chrome import ChromeDriverManager
 
+from http_client import replay_page_url
+from instrumentation import metrics
+from job_classifier import load_classifier
+from jungle_enrichment import COMPANY_CACHE_FILE, CompanyCache, JobDetailEnricher
+from profiler import profiled
+from seen_set import ExactSeenSet, add_seen_arguments, seen_set_from_args
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -21,11 +29,23 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 class WelcomeToJungleScraper:
   
     
-    def __init__(self):
+    def __init__(self, enrich=True, company_cache_file=COMPANY_CACHE_FILE, seen=None, record_pages=None):
         self.base_url = "https://www.welcometothejungle.com/en/jobs?refinementList%5Boffices.country_code%5D%5B%5D=US"
         self.driver = None
         self.jobs = []
         self.wait_time = 20
+        self.enrich = enrich
+        self.company_cache_file = company_cache_file
+        # Job links saved by earlier runs (persistent backends) and by this one.
+        self.seen = seen if seen is not None else ExactSeenSet()
+        # Links collected this run; they join self.seen once the CSV is written.
+        self.links = set()
+        # Archive path for the rendered results page, replayable with replay.py serve.
+        self.record_pages = record_pages
+        self.recorder = None
+        if record_pages:
+            from replay import Recorder
+            self.recorder = Recorder()
     
     def setup_driver(self):
         
@@ -203,36 +223,21 @@ class WelcomeToJungleScraper:
                 return None  # Skip if no link
             
             
-            for i, line in enumerate(text_lines):
-                line_lower = line.lower()
-                
-              
-                if not job['Job_Title'] and i == 0:
-                    job['Job_Title'] = line
-                
-             
-                elif not job['Company_Title'] and i == 1:
-                    job['Company_Title'] = line
-                
-               
-                elif 'employee' in line_lower and not job['Employes_Count']:
-                    job['Employes_Count'] = self.clean_employee_count(line)
-                
-                
-                elif any(k in line_lower for k in ['ago', 'yesterday', 'today']) and not job['Posted_Ago']:
-                    job['Posted_Ago'] = self.clean_posted_time(line)
-                
-               
-                elif any(k in line_lower for k in ['permanent', 'contract', 'internship', 'temporary']) and not job['Job_Type']:
-                    job['Job_Type'] = line
-                
-                
-                elif any(k in line_lower for k in ['remote', 'hybrid', 'on-site']) and not job['Work_Location']:
-                    job['Work_Location'] = line
-                
-              
-                elif any(k in line for k in ['New York', 'California', 'Texas', 'USA', 'United States']) and not job['Location']:
-                    job['Location'] = line
+            if text_lines:
+                job['Job_Title'] = text_lines[0]
+            if len(text_lines) > 1:
+                job['Company_Title'] = text_lines[1]
+            
+            
+            # Remaining lines: one regex scan each, first still-empty field wins.
+            load_classifier().assign(
+                job,
+                text_lines[2:],
+                transforms={
+                    'Employes_Count': self.clean_employee_count,
+                    'Posted_Ago': self.clean_posted_time,
+                },
+            )
             
             return job
             
@@ -244,7 +249,6 @@ class WelcomeToJungleScraper:
         try:
             logger.info("Step 5: Collecting job data...")
             
-            processed_urls = set()
             scroll_attempts = 0
             max_scrolls = 20
             no_new_jobs_count = 0
@@ -264,10 +268,13 @@ class WelcomeToJungleScraper:
                     if i % 20 == 0:
                         logger.info(f"Processing jobs... {i}/{len(job_cards)}")
                     
-                    job = self.extract_job_data(card)
-                    if job and job['Job_Link'] and job['Job_Link'] not in processed_urls:
-                        processed_urls.add(job['Job_Link'])
+                    with metrics.timer("parse_seconds", kind="extract_job_data"):
+                        job = self.extract_job_data(card)
+                    link = job['Job_Link'] if job else ''
+                    if link and link not in self.links and link not in self.seen:
+                        self.links.add(link)
                         self.jobs.append(job)
+                        metrics.inc("items_total", stage="jungle_browser")
                 
                 new_jobs = len(self.jobs) - initial_count
                 logger.info(f"Page {scroll_attempts + 1}: Found {new_jobs} new jobs (Total: {len(self.jobs)})")
@@ -291,6 +298,17 @@ class WelcomeToJungleScraper:
             logger.info(f"Continuing with {len(self.jobs)} jobs collected so far")
             return len(self.jobs) > 0
     
+    def enrich_details(self):
+        
+        if not self.enrich or not self.jobs:
+            return
+        try:
+            logger.info("Enriching jobs from job and company pages...")
+            enricher = JobDetailEnricher(CompanyCache(self.company_cache_file))
+            enricher.enrich(self.jobs)
+        except Exception as e:
+            logger.warning(f"Detail enrichment failed, keeping listing data: {e}")
+    
     def save_to_csv(self, filename="results.csv"):
        
         try:
@@ -321,6 +339,7 @@ class WelcomeToJungleScraper:
             
             logger.info(f"✓ Saved {len(self.jobs)} jobs to {filename}")
             print(f"\n✓ CSV file created: {filename}")
+            self.seen.update(self.links)
             
         except Exception as e:
             logger.error(f"Error saving to CSV: {e}")
@@ -331,39 +350,33 @@ class WelcomeToJungleScraper:
         print("="*60)
         
         
-        import pandas as pd
-        df = pd.read_csv('results.csv')
+        # Answers come from the jobs already in memory, parsed once into typed columns.
+        from jungle_analytics import answer_questions
+        answers = answer_questions(self.jobs)
         
         
-        total_jobs = len(df)
         print(f"\n(a) How many total jobs are there?")
-        print(f"    Answer: {total_jobs}")
+        print(f"    Answer: {answers['total_jobs']}")
         
         
-        ny_jobs = len(df[df['Location'].str.contains('New York', case=False, na=False)])
         print(f"\n(b) How many total jobs are there in New York?")
-        print(f"    Answer: {ny_jobs}")
+        print(f"    Answer: {answers['new_york_jobs']}")
         
         
-        df['Employes_Count_Num'] = pd.to_numeric(df['Employes_Count'], errors='coerce')
-        more_200 = len(df[df['Employes_Count_Num'] > 200])
         print(f"\n(c) How many companies have more than 200 Employees?")
-        print(f"    Answer: {more_200}")
+        print(f"    Answer: {answers['more_than_200_employees']}")
         
         #
-        less_200 = len(df[df['Employes_Count_Num'] < 200])
         print(f"\n(d) How many companies have less than 200 Employees?")
-        print(f"    Answer: {less_200}")
+        print(f"    Answer: {answers['less_than_200_employees']}")
         
        
-        permanent = len(df[df['Job_Type'].str.contains('Permanent', case=False, na=False)])
         print(f"\n(e) How many companies are in job type Permanent Contract?")
-        print(f"    Answer: {permanent}")
+        print(f"    Answer: {answers['permanent_contract_jobs']}")
         
         
-        internship = len(df[df['Job_Type'].str.contains('Internship', case=False, na=False)])
         print(f"\n(f) How many companies are in job type Internship?")
-        print(f"    Answer: {internship}")
+        print(f"    Answer: {answers['internship_jobs']}")
         
         print("\n" + "="*60)
     
@@ -379,7 +392,8 @@ class WelcomeToJungleScraper:
             
            
             logger.info(f"Opening URL: {self.base_url}")
-            self.driver.get(self.base_url)
+            # With SCRAPER_REPLAY_URL set this is the recorded static copy.
+            self.driver.get(replay_page_url(self.base_url))
             time.sleep(3)
             
            
@@ -394,14 +408,22 @@ class WelcomeToJungleScraper:
             self.wait_for_results()
             
             
-            self.scroll_and_collect()
+            with metrics.stage("jungle_browser"):
+                self.scroll_and_collect()
+            
+            if self.recorder:
+                self.recorder.record_page(self.base_url, self.driver.page_source)
+            
+            
+            self.enrich_details()
             
             
         
-            self.save_to_csv("results.csv")
+            with metrics.stage("export"):
+                self.save_to_csv("results.csv")
             
        
-            self.answer_questions()
+                self.answer_questions()
             
             logger.info("\n" + "="*60)
             logger.info("Scraping completed successfully!")
@@ -412,6 +434,9 @@ class WelcomeToJungleScraper:
             raise
         
         finally:
+            self.seen.close()
+            if self.recorder and len(self.recorder.archive):
+                self.recorder.archive.save(self.record_pages)
             if self.driver:
                 self.driver.quit()
                 logger.info("WebDriver closed")
@@ -419,8 +444,30 @@ class WelcomeToJungleScraper:
 
 def main():
     
-    scraper = WelcomeToJungleScraper()
-    scraper.run()
+    parser = argparse.ArgumentParser(description="Scrape Welcome to the Jungle business jobs")
+    parser.add_argument("--metrics-file", default="metrics_jungle.json")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port during the run")
+    parser.add_argument("--profile", action="store_true", help="Write profile_jungle.folded/.json next to results.csv")
+    parser.add_argument("--no-enrich", action="store_true", help="Skip job and company page enrichment")
+    parser.add_argument("--company-cache", default=COMPANY_CACHE_FILE, help="Company metadata cache file")
+    parser.add_argument("--record-pages", help="Save the rendered results page to this replay archive (.jsonl.gz)")
+    add_seen_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    
+    scraper = WelcomeToJungleScraper(
+        enrich=not args.no_enrich,
+        company_cache_file=args.company_cache,
+        seen=seen_set_from_args(args),
+        record_pages=args.record_pages,
+    )
+    try:
+        with profiled("profile_jungle" if args.profile else None):
+            scraper.run()
+    finally:
+        metrics.write_json(args.metrics_file)
 
 
 if __name__ == "__main__":
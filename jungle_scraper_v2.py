@@ -1,32 +1,137 @@
 
+import argparse
+import csv
 import logging
 import time
 import re
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+
+from http_client import replay_page_url
+from instrumentation import metrics
+from job_classifier import load_classifier
+from jungle_enrichment import COMPANY_CACHE_FILE, CompanyCache, JobDetailEnricher
+from jungle_search_api import JOB_HEADERS, JungleSearchClient
+from parse_pipeline import PARSE_PROCESSES, FetchParsePipeline
+from profiler import profiled
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+EMPLOYEE_COUNT_PATTERN = re.compile(r'(\d+)\s*employee', re.I)
+CARD_LIMIT = 100
+SEARCH_URL = "https://www.welcometothejungle.com/en/jobs?query=Business"
+
+
+def card_employee_count(line):
+    match = EMPLOYEE_COUNT_PATTERN.search(line)
+    return match.group(1) if match else ''
+
+
+def card_posted_ago(line):
+    return '1 days ago' if 'yesterday' in line.lower() else line
+
+
+CARD_TRANSFORMS = {
+    'Employes_Count': card_employee_count,
+    'Posted_Ago': card_posted_ago,
+}
+
+
+def parse_job_cards(page_source, limit=None):
+    # Pure function of the page HTML so it can run in a parse worker process.
+    from bs4 import BeautifulSoup
+    
+    if isinstance(page_source, bytes):
+        page_source = page_source.decode('utf-8', errors='replace')
+    started = time.perf_counter()
+    soup = BeautifulSoup(page_source, 'html.parser')
+    classifier = load_classifier()
+    jobs = []
+    
+    
+    job_cards = soup.find_all('article') or soup.find_all(attrs={'data-testid': lambda x: x and 'job' in str(x).lower()})
+    
+    if not job_cards:
+        # Try finding by class containing 'job'
+        job_cards = soup.find_all(class_=lambda x: x and 'job' in str(x).lower())
+    
+    logger.info(f"Found {len(job_cards)} job cards in HTML")
+    
+    for card in job_cards[:limit]:
+        try:
+            # Get all text from card
+            card_text = card.get_text(separator='\n', strip=True)
+            lines = [l.strip() for l in card_text.split('\n') if l.strip() and len(l.strip()) > 1]
+            
+            if len(lines) < 2:
+                continue
+            
+            
+            job_link = ''
+            link = card.find('a', href=True)
+            if link:
+                href = link['href']
+                job_link = href if href.startswith('http') else f"https://www.welcometothejungle.com{href}"
+            
+            if not job_link:
+                continue
+            
+            
+            job = {
+                'Job_Title': lines[0] if len(lines) > 0 else '',
+                'Company_Title': lines[1] if len(lines) > 1 else '',
+                'Company_Slogan': '',
+                'Job_Type': '',
+                'Location': '',
+                'Work_Location': '',
+                'Industry': '',
+                'Employes_Count': '',
+                'Posted_Ago': '',
+                'Job_Link': job_link
+            }
+            
+            # Every line can fill several fields; one regex scan per line.
+            classifier.assign(job, lines, transforms=CARD_TRANSFORMS, exclusive=False)
+            
+            jobs.append(job)
+            
+        except Exception as e:
+            continue
+    
+    metrics.observe("parse_seconds", time.perf_counter() - started, kind="parse_job_cards")
+    return jobs
+
+
+def parse_listing_page(page_source):
+    return parse_job_cards(page_source, limit=CARD_LIMIT)
+
+
 class WelcomeToJungleScraper:
-    def __init__(self):
+    def __init__(
+        self, enrich=True, company_cache_file=COMPANY_CACHE_FILE, parse_processes=PARSE_PROCESSES, record_pages=None
+    ):
         self.driver = None
         self.jobs = []
         self.wait_time = 15
+        self.enrich = enrich
+        self.company_cache_file = company_cache_file
+        self.parse_processes = parse_processes
+        # Archive path for the rendered search page, replayable with replay.py serve.
+        self.record_pages = record_pages
+        self.recorder = None
+        if record_pages:
+            from replay import Recorder
+            self.recorder = Recorder()
         
     def setup_driver(self):
        
         try:
             logger.info("Setting up Chrome WebDriver...")
+            # Only the browser fallback pays for importing selenium and webdriver_manager.
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+            from webdriver_manager.chrome import ChromeDriverManager
             
             chrome_options = Options()
             chrome_options.add_argument('--headless=new')
@@ -53,12 +158,14 @@ class WelcomeToJungleScraper:
         try:
             
             logger.info("Step 1: Navigating directly to Business search results...")
-            self.driver.get("https://www.welcometothejungle.com/en/jobs?query=Business")
+            # With SCRAPER_REPLAY_URL set this is the recorded static copy.
+            self.driver.get(replay_page_url(SEARCH_URL))
             time.sleep(6)
             logger.info("✓ Page loaded with search results")
             
             
             logger.info("Step 2: Checking for disclaimer popup...")
+            from selenium.webdriver.common.by import By
             try:
                 close_buttons = self.driver.find_elements(By.CSS_SELECTOR, "button[class*='close'], button[aria-label*='close' i], button[data-testid='close']")
                 for btn in close_buttons[:3]:
@@ -80,6 +187,21 @@ class WelcomeToJungleScraper:
             logger.error(f"Navigation failed: {e}")
             return False
     
+    def load_jobs_from_api(self, query="Business"):
+       
+        try:
+            logger.info(f"Fetching '{query}' jobs from the search API...")
+            client = JungleSearchClient()
+            with metrics.stage("jungle_search_api"):
+                self.jobs = client.search(query)
+            logger.info(f"✓ Fetched {len(self.jobs)} jobs from the search API")
+            return len(self.jobs) > 0
+            
+        except Exception as e:
+            logger.warning(f"Search API unavailable, falling back to browser: {e}")
+            self.jobs = []
+            return False
+    
     def fast_extract_jobs(self):
         
         try:
@@ -89,86 +211,21 @@ class WelcomeToJungleScraper:
             time.sleep(3)
             
           
+            # The driver only reads the page; the card parse runs in the
+            # pipeline's worker processes when --parse-processes is set.
             page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            
-            job_cards = soup.find_all('article') or soup.find_all(attrs={'data-testid': lambda x: x and 'job' in str(x).lower()})
-            
-            if not job_cards:
-                # Try finding by class containing 'job'
-                job_cards = soup.find_all(class_=lambda x: x and 'job' in str(x).lower())
-            
-            logger.info(f"Found {len(job_cards)} job cards in HTML")
-            
-            for card in job_cards[:100]:  # Limit to first 100
-                try:
-                    # Get all text from card
-                    card_text = card.get_text(separator='\n', strip=True)
-                    lines = [l.strip() for l in card_text.split('\n') if l.strip() and len(l.strip()) > 1]
-                    
-                    if len(lines) < 2:
-                        continue
-                    
-                    
-                    job_link = ''
-                    link = card.find('a', href=True)
-                    if link:
-                        href = link['href']
-                        job_link = href if href.startswith('http') else f"https://www.welcometothejungle.com{href}"
-                    
-                    if not job_link:
-                        continue
-                    
-                    
-                    job = {
-                        'Job_Title': lines[0] if len(lines) > 0 else '',
-                        'Company_Title': lines[1] if len(lines) > 1 else '',
-                        'Company_Slogan': '',
-                        'Job_Type': '',
-                        'Location': '',
-                        'Work_Location': '',
-                        'Industry': '',
-                        'Employes_Count': '',
-                        'Posted_Ago': '',
-                        'Job_Link': job_link
-                    }
-                    
-                    
-                    full_text = card_text.lower()
-                    
-                    for line in lines:
-                        line_lower = line.lower()
-                        
-                     
-                        if 'employee' in line_lower and not job['Employes_Count']:
-                            match = re.search(r'(\d+)\s*employee', line, re.I)
-                            if match:
-                                job['Employes_Count'] = match.group(1)
-                        
-                        
-                        if ('ago' in line_lower or 'yesterday' in line_lower) and not job['Posted_Ago']:
-                            if 'yesterday' in line_lower:
-                                job['Posted_Ago'] = '1 days ago'
-                            else:
-                                job['Posted_Ago'] = line
-                        
-                     
-                        if any(k in line_lower for k in ['permanent', 'contract', 'internship', 'temporary']) and not job['Job_Type']:
-                            job['Job_Type'] = line
-                        
-                        
-                        if any(k in line_lower for k in ['remote', 'hybrid', 'on-site']) and not job['Work_Location']:
-                            job['Work_Location'] = line
-                        
-                        
-                        if any(k in line for k in ['New York', 'California', 'Texas', 'Boston', 'Chicago', 'USA']) and not job['Location']:
-                            job['Location'] = line
-                    
-                    self.jobs.append(job)
-                    
-                except Exception as e:
-                    continue
+            if self.recorder:
+                self.recorder.record_page(SEARCH_URL, page_source)
+            pipeline = FetchParsePipeline(
+                fetch=lambda url: page_source.encode('utf-8'),
+                parse=parse_listing_page,
+                fetch_workers=1,
+                parse_processes=self.parse_processes,
+            )
+            with metrics.stage("jungle_browser"):
+                for _, jobs in pipeline.run([SEARCH_URL]):
+                    self.jobs.extend(jobs)
+                    metrics.inc("items_total", len(jobs), stage="jungle_browser")
             
             logger.info(f"✓ Extracted {len(self.jobs)} jobs")
             return True
@@ -177,6 +234,17 @@ class WelcomeToJungleScraper:
             logger.error(f"Extraction failed: {e}")
             return False
     
+    def enrich_details(self):
+        
+        if not self.enrich or not self.jobs:
+            return
+        try:
+            logger.info("Enriching jobs from job and company pages...")
+            enricher = JobDetailEnricher(CompanyCache(self.company_cache_file))
+            enricher.enrich(self.jobs)
+        except Exception as e:
+            logger.warning(f"Detail enrichment failed, keeping listing data: {e}")
+    
     def save_to_csv(self, filename='results.csv'):
         
         try:
@@ -184,8 +252,10 @@ class WelcomeToJungleScraper:
                 logger.warning("No jobs to save")
                 return False
             
-            df = pd.DataFrame(self.jobs)
-            df.to_csv(filename, index=False)
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=JOB_HEADERS, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(self.jobs)
             logger.info(f"✓ Saved {len(self.jobs)} jobs to {filename}")
             return True
             
@@ -204,40 +274,36 @@ class WelcomeToJungleScraper:
                 logger.warning("No data to analyze")
                 return
             
-            df = pd.DataFrame(self.jobs)
+            # pandas is only needed here, so it loads with the analytics module.
+            from jungle_analytics import answer_questions
+            
+            answers = answer_questions(self.jobs)
             
            
-            recent_jobs = df[df['Posted_Ago'].str.contains('hour|today|1 day', case=False, na=False)]
-            q1 = len(recent_jobs)
-            logger.info(f"\n1. Jobs posted in last 24 hours: {q1}")
+            logger.info(f"\n1. Jobs posted in last 24 hours: {answers['posted_last_24_hours']}")
             
             
-            if len(df) > 0 and 'Company_Title' in df.columns:
-                top_company = df['Company_Title'].value_counts().iloc[0:1]
-                if len(top_company) > 0:
-                    logger.info(f"2. Company with most listings: {top_company.index[0]} ({top_company.values[0]} jobs)")
+            top_company = answers['top_company']
+            if top_company:
+                logger.info(f"2. Company with most listings: {top_company['name']} ({top_company['jobs']} jobs)")
             
             
-            remote_jobs = df[df['Work_Location'].str.contains('remote', case=False, na=False)]
-            q3 = len(remote_jobs)
-            logger.info(f"3. Remote jobs available: {q3}")
+            logger.info(f"3. Remote jobs available: {answers['remote_jobs']}")
       
-            if len(df) > 0 and 'Job_Type' in df.columns:
-                job_types = df['Job_Type'].value_counts()
-                if len(job_types) > 0:
-                    logger.info(f"4. Most common job type: {job_types.index[0]} ({job_types.values[0]} jobs)")
+            top_job_type = answers['top_job_type']
+            if top_job_type:
+                logger.info(f"4. Most common job type: {top_job_type['name']} ({top_job_type['jobs']} jobs)")
             
          
-            if len(df) > 0 and 'Location' in df.columns:
-                locations = df[df['Location'] != '']['Location'].value_counts()
-                if len(locations) > 0:
-                    logger.info(f"5. Location with most openings: {locations.index[0]} ({locations.values[0]} jobs)")
+            top_location = answers['top_location']
+            if top_location:
+                logger.info(f"5. Location with most openings: {top_location['name']} ({top_location['jobs']} jobs)")
             
             
-            total = len(df)
-            with_count = len(df[df['Employes_Count'] != ''])
-            percentage = (with_count / total * 100) if total > 0 else 0
-            logger.info(f"6. Jobs with employee count: {percentage:.1f}% ({with_count}/{total})")
+            logger.info(
+                f"6. Jobs with employee count: {answers['with_employee_count_pct']:.1f}% "
+                f"({answers['with_employee_count']}/{answers['total_jobs']})"
+            )
             
             logger.info("="*60 + "\n")
             
@@ -251,23 +317,29 @@ class WelcomeToJungleScraper:
             logger.info("WELCOME TO THE JUNGLE JOB SCRAPER")
             logger.info("="*60 + "\n")
             
-          
-            if not self.setup_driver():
-                return False
             
+            if not self.load_jobs_from_api():
+                
+                if not self.setup_driver():
+                    return False
+                
+                
+                if not self.navigate_and_search():
+                    return False
+                
+                if not self.fast_extract_jobs():
+                    return False
             
-            if not self.navigate_and_search():
-                return False
             
-            if not self.fast_extract_jobs():
-                return False
+            self.enrich_details()
             
            
-            if not self.save_to_csv():
-                return False
+            with metrics.stage("export"):
+                if not self.save_to_csv():
+                    return False
             
            
-            self.answer_questions()
+                self.answer_questions()
             
             logger.info("\n✓ Scraping completed successfully!")
             return True
@@ -277,10 +349,36 @@ class WelcomeToJungleScraper:
             return False
             
         finally:
+            if self.recorder and len(self.recorder.archive):
+                self.recorder.archive.save(self.record_pages)
             if self.driver:
                 self.driver.quit()
                 logger.info("✓ Browser closed")
 
 if __name__ == "__main__":
-    scraper = WelcomeToJungleScraper()
-    scraper.run()
+    parser = argparse.ArgumentParser(description="Scrape Welcome to the Jungle business jobs")
+    parser.add_argument("--metrics-file", default="metrics_jungle.json")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port during the run")
+    parser.add_argument("--profile", action="store_true", help="Write profile_jungle.folded/.json next to results.csv")
+    parser.add_argument("--no-enrich", action="store_true", help="Skip job and company page enrichment")
+    parser.add_argument("--company-cache", default=COMPANY_CACHE_FILE, help="Company metadata cache file")
+    parser.add_argument(
+        "--parse-processes", type=int, default=PARSE_PROCESSES, help="Parse job cards in this many worker processes"
+    )
+    parser.add_argument("--record-pages", help="Save the rendered search page to this replay archive (.jsonl.gz)")
+    args = parser.parse_args()
+    
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    
+    scraper = WelcomeToJungleScraper(
+        enrich=not args.no_enrich,
+        company_cache_file=args.company_cache,
+        parse_processes=args.parse_processes,
+        record_pages=args.record_pages,
+    )
+    try:
+        with profiled("profile_jungle" if args.profile else None):
+            scraper.run()
+    finally:
+        metrics.write_json(args.metrics_file)
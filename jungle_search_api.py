@@ -0,0 +1,329 @@
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+import requests
+
+from http_client import HttpClient, build_session, read_json
+from instrumentation import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+SITE_URL = "https://www.welcometothejungle.com"
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "application/json, text/html;q=0.9",
+}
+HITS_PER_PAGE = 100
+API_WORKERS = 8
+SEARCH_RATE = 10.0
+# Facets used to split a query whose hit count exceeds the index pagination limit.
+PARTITION_FACETS = ["contract_type", "remote", "organization.nb_employees"]
+# The index returns at most this many values per facet (its own cap is 1000).
+MAX_VALUES_PER_FACET = 1000
+# Attempts per result page; HttpClient already retries throttling and 5xx.
+PAGE_ATTEMPTS = 3
+
+
+JOB_HEADERS = [
+    "Job_Title",
+    "Company_Title",
+    "Company_Slogan",
+    "Job_Type",
+    "Location",
+    "Work_Location",
+    "Industry",
+    "Employes_Count",
+    "Posted_Ago",
+    "Job_Link",
+]
+
+CONTRACT_TYPES = {
+    "full_time": "Permanent contract",
+    "part_time": "Part-time",
+    "temporary": "Temporary",
+    "internship": "Internship",
+    "apprenticeship": "Work study",
+    "freelance": "Freelance",
+    "vie": "VIE",
+    "graduate_program": "Graduate program",
+    "volunteer": "Volunteer",
+    "idv": "IDV",
+    "other": "Other",
+}
+
+REMOTE_TYPES = {
+    "fulltime": "Fully-remote",
+    "partial": "Hybrid",
+    "punctual": "Occasional remote",
+    "no": "On-site",
+}
+
+
+class SearchConfigError(Exception):
+    pass
+
+
+class IncompleteResultsError(Exception):
+    pass
+
+
+def empty_job() -> Dict[str, str]:
+    return {header: "" for header in JOB_HEADERS}
+
+
+def format_posted_ago(published_at: str, now: Optional[datetime] = None) -> str:
+    if not published_at:
+        return ""
+    try:
+        published = datetime.fromisoformat(published_at.replace("Z", "+00:00"))
+    except ValueError:
+        return ""
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    hours = int((now - published).total_seconds() // 3600)
+    if hours < 24:
+        return f"{max(hours, 0)} hours ago"
+    # Same wording as clean_posted_time() in the browser scrapers.
+    return f"{hours // 24} days ago"
+
+
+def hit_to_job(hit: dict, language: str = "en") -> Dict[str, str]:
+    job = empty_job()
+    organization = hit.get("organization") or {}
+
+    job["Job_Title"] = hit.get("name") or ""
+    job["Company_Title"] = organization.get("name") or ""
+    job["Company_Slogan"] = organization.get("summary") or organization.get("description") or ""
+
+    contract_type = hit.get("contract_type") or ""
+    job["Job_Type"] = CONTRACT_TYPES.get(contract_type, contract_type.replace("_", " ").capitalize())
+
+    offices = hit.get("offices") or []
+    if offices and isinstance(offices[0], dict):
+        office = offices[0]
+        parts = [office.get("city"), office.get("state"), office.get("country")]
+        job["Location"] = ", ".join(part for part in parts if part)
+
+    remote = hit.get("remote") or ""
+    job["Work_Location"] = REMOTE_TYPES.get(remote, remote)
+
+    sectors = hit.get("sectors") or organization.get("sectors") or []
+    industries: List[str] = []
+    for sector in sectors:
+        if isinstance(sector, dict):
+            name = sector.get("parent_name") or sector.get("name")
+        else:
+            name = sector
+        if name and name not in industries:
+            industries.append(name)
+    job["Industry"] = " | ".join(industries)
+
+    employees = organization.get("nb_employees")
+    if employees is not None:
+        job["Employes_Count"] = str(employees)
+
+    job["Posted_Ago"] = format_posted_ago(hit.get("published_at") or "")
+
+    company_slug = organization.get("slug") or ""
+    job_slug = hit.get("slug") or ""
+    if company_slug and job_slug:
+        job["Job_Link"] = f"{SITE_URL}/{language}/companies/{company_slug}/jobs/{job_slug}"
+
+    return job
+
+
+class JungleSearchClient:
+    def __init__(
+        self,
+        language: str = "en",
+        app_id: str = "",
+        api_key: str = "",
+        index_name: str = "",
+        workers: int = API_WORKERS,
+        session: Optional[requests.Session] = None,
+        http: Optional[HttpClient] = None,
+    ):
+        self.language = language
+        self.app_id = app_id
+        self.api_key = api_key
+        self.index_name = index_name
+        self.workers = workers
+        if http is None:
+            session = session or build_session(HEADERS, default_pool_size=workers + 2)
+            http = HttpClient(session, default_rate=SEARCH_RATE)
+        self.http = http
+        self.session = http.session
+
+    @property
+    def query_url(self) -> str:
+        return f"https://{self.app_id.lower()}-dsn.algolia.net/1/indexes/{self.index_name}/query"
+
+    def discover(self, query: str = "") -> None:
+        if self.app_id and self.api_key and self.index_name:
+            return
+
+        url = f"{SITE_URL}/{self.language}/jobs"
+        if query:
+            url += "?" + urlencode({"query": query})
+        response = self.http.get(url, timeout=30)
+        response.raise_for_status()
+        html = response.text
+
+        def find(pattern: str) -> str:
+            match = re.search(r"[\"']?(?:PUBLIC_)?" + pattern + r"[\"']?\s*[:=]\s*[\"']([^\"']+)[\"']", html)
+            return match.group(1) if match else ""
+
+        self.app_id = self.app_id or find("ALGOLIA_APPLICATION_ID")
+        self.api_key = self.api_key or find("ALGOLIA_API_KEY_CLIENT") or find("ALGOLIA_API_KEY")
+        if not self.index_name:
+            prefix = find("ALGOLIA_JOBS_INDEX_PREFIX")
+            self.index_name = f"{prefix}_{self.language}" if prefix else find("ALGOLIA_JOBS_INDEX")
+
+        if not (self.app_id and self.api_key and self.index_name):
+            raise SearchConfigError("Could not discover search API parameters from " + url)
+        logger.info("Discovered search index %s (app %s)", self.index_name, self.app_id)
+
+    def search_page(
+        self,
+        query: str,
+        page: int,
+        facet_filters: Sequence[str] = (),
+        hits_per_page: int = HITS_PER_PAGE,
+        facets: Sequence[str] = (),
+        max_values_per_facet: int = 0,
+    ) -> dict:
+        params: List[Tuple[str, str]] = [
+            ("query", query),
+            ("page", str(page)),
+            ("hitsPerPage", str(hits_per_page)),
+        ]
+        if facet_filters:
+            params.append(("facetFilters", json.dumps(list(facet_filters))))
+        if facets:
+            params.append(("facets", json.dumps(list(facets))))
+        if max_values_per_facet:
+            params.append(("maxValuesPerFacet", str(max_values_per_facet)))
+
+        headers = {
+            "X-Algolia-Application-Id": self.app_id,
+            "X-Algolia-API-Key": self.api_key,
+            "Referer": SITE_URL + "/",
+            "Origin": SITE_URL,
+        }
+        response = self.http.post(
+            self.query_url,
+            data=json.dumps({"params": urlencode(params)}),
+            headers=headers,
+            timeout=30,
+        )
+        response.raise_for_status()
+        return read_json(response)
+
+    def fetch_page(self, query: str, page: int, facet_filters: Sequence[str] = ()) -> List[dict]:
+        for attempt in range(1, PAGE_ATTEMPTS + 1):
+            try:
+                return self.search_page(query, page, facet_filters).get("hits", [])
+            except Exception as exc:
+                if attempt == PAGE_ATTEMPTS:
+                    raise IncompleteResultsError(f"Search page {page} of {query!r} {list(facet_filters)} failed: {exc}")
+                logger.warning("Search page %s failed (attempt %s/%s): %s", page, attempt, PAGE_ATTEMPTS, exc)
+        return []
+
+    def fetch_hits(self, query: str, facet_filters: Sequence[str] = ()) -> List[dict]:
+        first = self.search_page(query, 0, facet_filters)
+        hits: List[dict] = list(first.get("hits", []))
+        nb_pages = int(first.get("nbPages", 1) or 1)
+        nb_hits = int(first.get("nbHits", len(hits)) or 0)
+
+        if nb_hits > nb_pages * HITS_PER_PAGE:
+            partitioned = self.fetch_partitioned(query, facet_filters, nb_hits)
+            if partitioned is not None:
+                return partitioned
+            logger.warning("Query %r has %s hits but only %s are reachable", query, nb_hits, nb_pages * HITS_PER_PAGE)
+
+        if nb_pages > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pages = [executor.submit(self.fetch_page, query, page, facet_filters) for page in range(1, nb_pages)]
+                for page in pages:
+                    hits.extend(page.result())
+
+        logger.info("Query %r %s: fetched %s/%s hits", query, list(facet_filters), len(hits), nb_hits)
+        return hits
+
+    def fetch_partitioned(self, query: str, facet_filters: Sequence[str], nb_hits: int) -> Optional[List[dict]]:
+        """Fetch every hit of an oversized query as one sub-query per facet value.
+
+        The split is only used when it reaches every hit: hits with no value
+        for the facet, or with values beyond the ones the index listed, are
+        fetched by one more sub-query that excludes all listed values.
+        """
+        used = {item.split(":", 1)[0] for item in facet_filters}
+        for facet in PARTITION_FACETS:
+            if facet in used:
+                continue
+            counts = self.search_page(
+                query, 0, facet_filters, hits_per_page=0, facets=[facet], max_values_per_facet=MAX_VALUES_PER_FACET
+            )
+            values = (counts.get("facets") or {}).get(facet) or {}
+            if len(values) < 2:
+                continue
+
+            listed = sum(values.values())
+            filters = [[*facet_filters, f"{facet}:{value}"] for value in values]
+            if listed < nb_hits:
+                # Negated values AND together: the hits none of the listed buckets cover.
+                filters.append([*facet_filters, *(f"{facet}:-{value}" for value in values)])
+            logger.info(
+                "Splitting query %r (%s hits) on %s: %s values covering %s, %s",
+                query,
+                nb_hits,
+                facet,
+                len(values),
+                listed,
+                "plus the remainder" if listed < nb_hits else "no remainder",
+            )
+
+            hits: List[dict] = []
+            seen_ids = set()
+            for partition in filters:
+                for hit in self.fetch_hits(query, partition):
+                    # Multi-valued facets put one hit in several buckets.
+                    object_id = hit.get("objectID")
+                    if object_id is None or object_id not in seen_ids:
+                        seen_ids.add(object_id)
+                        hits.append(hit)
+            if len(hits) < nb_hits:
+                raise IncompleteResultsError(
+                    f"Query {query!r} {list(facet_filters)} split on {facet} reached {len(hits)}/{nb_hits} hits"
+                )
+            return hits
+        return None
+
+    def search(self, query: str, country_code: str = "") -> List[Dict[str, str]]:
+        self.discover(query)
+        facet_filters = [f"offices.country_code:{country_code}"] if country_code else []
+
+        jobs: List[Dict[str, str]] = []
+        seen_links = set()
+        hits = self.fetch_hits(query, facet_filters)
+        with metrics.timer("parse_seconds", kind="search_hits"):
+            for hit in hits:
+                job = hit_to_job(hit, self.language)
+                if job["Job_Link"] and job["Job_Link"] not in seen_links:
+                    seen_links.add(job["Job_Link"])
+                    jobs.append(job)
+        metrics.inc("items_total", len(jobs), stage="jungle_search_api")
+        return jobs
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+
+logger = logging.getLogger(__name__)
+
+
+# Carried-forward pages are re-parsed (and their products re-enriched) after a day,
+# so PDP-only fields such as size availability do not go stale forever.
+SNAPSHOT_TTL = 24 * 3600
+
+
+def page_key(url: str, params: Optional[Sequence[Tuple[str, str]]] = None) -> str:
+    # Parameter order varies between builders; the page identity does not.
+    query = urlencode(sorted((str(k), str(v)) for k, v in params or []))
+    return f"{url}?{query}" if query else url
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class ListingSnapshot:
+    """Per-page content hashes and the records each page produced last run.
+
+    ``carry`` returns the stored records of a page whose body hash (or ETag)
+    is unchanged and younger than ``ttl``, so the caller can skip parsing and
+    enrichment. ``save`` stores the final, enriched records for the next run.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = SNAPSHOT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.pages: Dict[str, dict] = {}
+        self.records: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.unchanged = 0
+        self.changed = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    def fresh(self, key: str) -> Optional[dict]:
+        page = self.pages.get(key)
+        if page is None or time.time() - page["fetched_at"] > self.ttl:
+            return None
+        return page
+
+    def etag(self, key: str) -> str:
+        # Only worth a conditional request when a 304 could be answered from here.
+        page = self.fresh(key)
+        return page.get("etag", "") if page else ""
+
+    def carry(self, key: str, digest: Optional[str] = None) -> Optional[List[dict]]:
+        """Stored records for an unchanged page; None when it must be parsed.
+
+        ``digest=None`` means the server already confirmed the page unchanged (304).
+        """
+        with self.lock:
+            page = self.fresh(key)
+            if page is None or (digest is not None and page["hash"] != digest):
+                self.changed += 1
+                return None
+            records = [self.records[url] for url in page["urls"] if url in self.records]
+            if len(records) != len(page["urls"]):
+                # Some records were never saved (e.g. the run failed); parse again.
+                self.changed += 1
+                return None
+            self.unchanged += 1
+            return [dict(record) for record in records]
+
+    def record(self, key: str, digest: str, etag: str, urls: Iterable[str]) -> None:
+        with self.lock:
+            self.pages[key] = {"hash": digest, "etag": etag, "fetched_at": time.time(), "urls": list(urls)}
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as snapshot_file:
+                stored = json.load(snapshot_file)
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable listing snapshot %s: %s", self.path, exc)
+            return
+        self.pages = stored.get("pages", {})
+        self.records = stored.get("records", {})
+        logger.info("Loaded listing snapshot with %s pages from %s", len(self.pages), self.path)
+
+    def save(self, records: Dict[str, dict]) -> None:
+        if not self.path:
+            return
+        now = time.time()
+        with self.lock:
+            pages = {key: page for key, page in self.pages.items() if now - page["fetched_at"] <= self.ttl}
+            wanted = {url for page in pages.values() for url in page["urls"]}
+            self.records = {url: record for url, record in records.items() if url in wanted}
+            snapshot = {"pages": pages, "records": self.records}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+        os.replace(tmp_path, self.path)
+        logger.info(
+            "Saved listing snapshot: %s pages, %s records (%s pages unchanged this run, %s changed)",
+            len(pages),
+            len(self.records),
+            self.unchanged,
+            self.changed,
+        )
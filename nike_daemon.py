@@ -0,0 +1,382 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from catalog_stats import STATS_FILE
+from instrumentation import metrics
+from nike_markets import MARKETS_FILE, load_markets
+from nike_scraper import LISTING_SNAPSHOT_FILE, Market, NikeScraperPH, Product
+from nike_reviews import REVIEW_CACHE_FILE
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+DAEMON_PORT = 8770
+PRICE_INTERVAL = 15 * 60
+LISTING_INTERVAL = 60 * 60
+ENRICHMENT_INTERVAL = 24 * 3600
+# Known products missing from this many consecutive re-listings are sold out or
+# delisted; they are dropped before the next export.
+DELIST_AFTER_PASSES = 3
+# How often the scheduler wakes to check for due jobs when nothing wakes it earlier.
+IDLE_WAIT = 30.0
+JOB_NAMES = ["enrichment", "listing", "prices"]
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    interval: float
+    next_due: float = 0.0
+    runs: int = 0
+    failures: int = 0
+    last_started: Optional[float] = None
+    last_seconds: Optional[float] = None
+    last_error: str = ""
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "due_in_seconds": round(max(0.0, self.next_due - now), 1),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started": self.last_started,
+            "last_seconds": self.last_seconds,
+            "last_error": self.last_error,
+        }
+
+
+class CrawlDaemon:
+    """Keeps one warm scraper and runs its jobs on separate intervals.
+
+    ``prices`` re-lists the catalog and updates prices on known products,
+    ``listing`` also enriches products that appeared since the last listing
+    (including those a ``prices`` job found first), and
+    ``enrichment`` re-fetches every PDP and review summary. The session pools,
+    review cache, listing snapshot and dedup index live as long as the daemon.
+    Every job re-lists first and drops products the listing has not shown for
+    ``delist_after`` passes. Jobs run one at a time on the scheduler thread.
+    """
+
+    def __init__(
+        self,
+        market: Optional[Market] = None,
+        output_dir: str = ".",
+        price_interval: float = PRICE_INTERVAL,
+        listing_interval: float = LISTING_INTERVAL,
+        enrichment_interval: float = ENRICHMENT_INTERVAL,
+        delist_after: int = DELIST_AFTER_PASSES,
+    ):
+        self.output_dir = output_dir
+        self.delist_after = max(1, delist_after)
+        self.scraper = NikeScraperPH(
+            market=market,
+            review_cache_file=os.path.join(output_dir, REVIEW_CACHE_FILE),
+            snapshot_file=os.path.join(output_dir, LISTING_SNAPSHOT_FILE),
+        )
+        self.jobs: Dict[str, ScheduledJob] = {
+            "enrichment": ScheduledJob("enrichment", enrichment_interval),
+            "listing": ScheduledJob("listing", listing_interval),
+            "prices": ScheduledJob("prices", price_interval),
+        }
+        # Start with a listing: it enriches whatever the snapshot cannot carry forward,
+        # which on a cold start is everything.
+        now = time.time()
+        self.jobs["enrichment"].next_due = now + enrichment_interval
+        self.jobs["prices"].next_due = now + price_interval
+        self.enriched: Set[str] = set()
+        # Product URL -> consecutive re-listings that did not show it.
+        self.missing: Dict[str, int] = {}
+        self.delisted = 0
+        self.running: Optional[str] = None
+        self.started = time.time()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.server: Optional["ThreadingHTTPServer"] = None
+
+    def output_path(self, name: str) -> str:
+        return os.path.join(self.output_dir, name)
+
+    def relist(self) -> List[Product]:
+        # Known products take the fresh listing fields; returns the ones not seen before.
+        scraper = self.scraper
+        before = len(scraper.products)
+        updated = scraper.index.updated
+        scraper.refreshing = bool(scraper.products)
+        scraper.index.begin_pass()
+        try:
+            scraper.load_all_products()
+        finally:
+            scraper.refreshing = False
+        changed = scraper.index.updated - updated
+        metrics.inc("price_changes_total", changed)
+        logger.info("Re-listed catalog: %s new products, %s updated", len(scraper.products) - before, changed)
+        new = scraper.products[before:]
+        self.drop_delisted()
+        return new
+
+    def drop_delisted(self) -> None:
+        scraper = self.scraper
+        listed = scraper.index.listed
+        if not listed:
+            # A listing that returned nothing failed; it is no evidence of delisting.
+            logger.warning("Re-listing returned no products; keeping all %s known products", len(scraper.products))
+            return
+        kept: List[Product] = []
+        for product in scraper.products:
+            url = product.Product_URL
+            if id(product) in listed:
+                self.missing.pop(url, None)
+                kept.append(product)
+                continue
+            self.missing[url] = self.missing.get(url, 0) + 1
+            if self.missing[url] < self.delist_after:
+                kept.append(product)
+                continue
+            del self.missing[url]
+            scraper.index.remove(product)
+            scraper.carried.discard(url)
+            scraper.unenriched.discard(url)
+            self.enriched.discard(url)
+        dropped = len(scraper.products) - len(kept)
+        if dropped:
+            scraper.products[:] = kept
+            self.delisted += dropped
+            metrics.inc("delisted_total", dropped)
+            logger.info("Dropped %s products missing from %s re-listings", dropped, self.delist_after)
+
+    def enrich(self, products: List[Product]) -> None:
+        # Products carried from the snapshot arrive enriched.
+        pending = [p for p in products if p.Product_URL not in self.enriched and p.Product_URL not in self.scraper.carried]
+        if pending:
+            self.scraper.enrich_products(pending)
+        self.enriched.update(p.Product_URL for p in products if p.Product_URL not in self.scraper.unenriched)
+
+    def export(self) -> None:
+        self.scraper.export(
+            self.output_path("products_data.csv"),
+            self.output_path("top_20_rating_review.csv"),
+            self.output_path(STATS_FILE),
+        )
+        metrics.write_json(self.output_path("metrics.json"))
+
+    def run_prices(self) -> None:
+        new = self.relist()
+        # Not enriched here: the next listing job picks them up, and until then the
+        # snapshot leaves them out so their pages are not carried forward as enriched.
+        self.scraper.unenriched.update(p.Product_URL for p in new)
+        self.export()
+
+    def run_listing(self) -> None:
+        new = self.relist()
+        # Known products an earlier budget skipped get another turn alongside the new ones.
+        scraper = self.scraper
+        new_ids = {id(product) for product in new}
+        skipped = [p for p in scraper.products if p.Product_URL in scraper.unenriched and id(p) not in new_ids]
+        self.enrich(skipped + new)
+        self.scraper.refresh_review_summaries()
+        self.export()
+
+    def run_enrichment(self) -> None:
+        self.relist()
+        # Everything, carried or not: size availability only changes on the PDP.
+        scraper = self.scraper
+        scraper.enrich_products(list(scraper.products))
+        self.enriched.update(p.Product_URL for p in scraper.products if p.Product_URL not in scraper.unenriched)
+        scraper.carried.clear()
+        scraper.refresh_review_summaries()
+        self.export()
+
+    def run_job(self, job: ScheduledJob) -> None:
+        with self.lock:
+            self.running = job.name
+        job.last_started = time.time()
+        started = time.perf_counter()
+        try:
+            with metrics.stage(f"daemon_{job.name}"):
+                getattr(self, f"run_{job.name}")()
+            job.last_error = ""
+        except Exception as exc:
+            job.failures += 1
+            job.last_error = f"{exc.__class__.__name__}: {exc}"
+            logger.warning("Job %s failed: %s", job.name, exc)
+        finally:
+            job.runs += 1
+            job.last_seconds = round(time.perf_counter() - started, 2)
+            job.next_due = time.time() + job.interval
+            with self.lock:
+                self.running = None
+        logger.info("Job %s finished in %.1fs; next in %ss", job.name, job.last_seconds, job.interval)
+
+    def due_job(self, now: float) -> Optional[ScheduledJob]:
+        # The most thorough due job wins; it also covers what the cheaper ones do.
+        for name in JOB_NAMES:
+            job = self.jobs[name]
+            if job.next_due <= now:
+                return job
+        return None
+
+    def trigger(self, name: str) -> bool:
+        job = self.jobs.get(name)
+        if job is None:
+            return False
+        job.next_due = 0.0
+        self.wake.set()
+        return True
+
+    def loop(self) -> None:
+        while not self.stopping.is_set():
+            job = self.due_job(time.time())
+            if job is not None:
+                self.run_job(job)
+                # A heavier job resets the clocks of the cheaper ones it subsumed.
+                for name in JOB_NAMES[JOB_NAMES.index(job.name) + 1:]:
+                    self.jobs[name].next_due = max(self.jobs[name].next_due, time.time() + self.jobs[name].interval)
+                continue
+            wait = min(job.next_due for job in self.jobs.values()) - time.time()
+            self.wake.wait(timeout=max(0.0, min(wait, IDLE_WAIT)))
+            self.wake.clear()
+
+    def status(self) -> dict:
+        now = time.time()
+        scraper = self.scraper
+        with self.lock:
+            running = self.running
+        return {
+            "market": scraper.market.code,
+            "uptime_seconds": round(now - self.started, 1),
+            "running": running,
+            "products": len(scraper.products),
+            "enriched": len(self.enriched),
+            "missing_from_listing": len(self.missing),
+            "delisted": self.delisted,
+            "carried": len(scraper.carried),
+            "duplicates_merged": scraper.index.duplicates,
+            "listing_updates": scraper.index.updated,
+            "review_cache_entries": len(scraper.reviews.cache.entries),
+            "http_retries": scraper.http.retries,
+            "jobs": {name: job.to_dict(now) for name, job in self.jobs.items()},
+        }
+
+    def serve(self, port: int = DAEMON_PORT) -> "ThreadingHTTPServer":
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # GET /status, GET /metrics, POST /run/<job>, POST /stop; localhost only.
+            def do_GET(self) -> None:
+                path = self.path.rstrip("/")
+                if path in ("", "/status"):
+                    self.respond(200, daemon.status())
+                elif path == "/metrics":
+                    self.respond(200, metrics.prometheus_text(), "text/plain; version=0.0.4")
+                else:
+                    self.respond(404, {"error": "not found"})
+
+            def do_POST(self) -> None:
+                path = self.path.rstrip("/")
+                if path.startswith("/run/"):
+                    name = path[len("/run/"):]
+                    if daemon.trigger(name):
+                        self.respond(202, {"scheduled": name})
+                    else:
+                        self.respond(404, {"error": f"unknown job {name!r}", "jobs": JOB_NAMES})
+                elif path == "/stop":
+                    self.respond(202, {"stopping": True})
+                    daemon.stop()
+                else:
+                    self.respond(404, {"error": "not found"})
+
+            def respond(self, status: int, payload: object, content_type: str = "application/json") -> None:
+                body = (payload if isinstance(payload, str) else json.dumps(payload, indent=2)).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="daemon-control", daemon=True).start()
+        self.server = server
+        logger.info("Daemon control on http://127.0.0.1:%s/status", server.server_address[1])
+        return server
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self.wake.set()
+
+    def run_forever(self, port: Optional[int] = DAEMON_PORT) -> None:
+        if port is not None:
+            self.serve(port)
+        try:
+            self.loop()
+        finally:
+            if self.server is not None:
+                self.server.shutdown()
+            metrics.write_json(self.output_path("metrics.json"))
+            logger.info("Daemon stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run Nike crawls on a schedule with warm sessions and caches")
+    parser.add_argument("--config", default=MARKETS_FILE)
+    parser.add_argument("--market", default="PH", help="Market code from the config")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help="Local control/status port")
+    parser.add_argument("--price-interval", type=float, default=PRICE_INTERVAL, help="Seconds between price checks")
+    parser.add_argument("--listing-interval", type=float, default=LISTING_INTERVAL, help="Seconds between re-listings")
+    parser.add_argument(
+        "--enrichment-interval",
+        type=float,
+        default=ENRICHMENT_INTERVAL,
+        help="Seconds between full PDP and review refreshes",
+    )
+    parser.add_argument(
+        "--delist-after",
+        type=int,
+        default=DELIST_AFTER_PASSES,
+        help="Drop products missing from this many consecutive re-listings",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        help="PDP parse worker processes, overriding the config; 0 parses in the calling thread",
+    )
+    args = parser.parse_args()
+
+    markets = load_markets(args.config, [args.market])
+    if markets and args.parse_processes is not None:
+        markets[0].parse_processes = args.parse_processes
+    os.makedirs(args.output_dir, exist_ok=True)
+    daemon = CrawlDaemon(
+        markets[0] if markets else None,
+        args.output_dir,
+        price_interval=args.price_interval,
+        listing_interval=args.listing_interval,
+        enrichment_interval=args.enrichment_interval,
+        delist_after=args.delist_after,
+    )
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    daemon.run_forever(args.port)
+
+
+if __name__ == "__main__":
+    main()
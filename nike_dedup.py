@@ -0,0 +1,107 @@
+import re
+import threading
+from dataclasses import fields
+from typing import Any, Dict, List, Sequence, Set
+from urllib.parse import urlparse, urlunparse
+
+
+SITE_ORIGIN = "https://www.nike.com"
+# Style-colour codes: CW2288-111, FD0736-001, HV9916-001.
+STYLE_CODE_PATTERN = re.compile(r"^[A-Z0-9]{5,8}-[A-Z0-9]{3}$")
+
+
+def canonical_url(url: str) -> str:
+    """Absolute https PDP URL without query, fragment or trailing slash."""
+    url = url.strip()
+    if not url:
+        return ""
+    if url.startswith("/"):
+        url = SITE_ORIGIN + url
+    parsed = urlparse(url)
+    return urlunparse(("https", parsed.netloc.lower(), parsed.path.rstrip("/") or "/", "", "", ""))
+
+
+def url_style_code(url: str) -> str:
+    # PDP paths end in the style-colour code: /ph/t/<slug>/<CODE>
+    segment = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1].upper()
+    return segment if STYLE_CODE_PATTERN.match(segment) else ""
+
+
+def product_keys(product: Any) -> List[str]:
+    """Index keys for a product: its style-colour codes and its locale-free path."""
+    keys = []
+    for code in (url_style_code(product.Product_URL), product.Style_Code.strip().upper()):
+        if code and STYLE_CODE_PATTERN.match(code) and f"style:{code}" not in keys:
+            keys.append(f"style:{code}")
+    path = urlparse(product.Product_URL).path.rstrip("/").lower()
+    if "/t/" in path:
+        # /ph/t/..., /gb/en/t/... and /t/... are the same page.
+        path = path[path.index("/t/"):]
+    if path:
+        keys.append(f"path:{path}")
+    return keys
+
+
+def merge_product(target: Any, source: Any) -> bool:
+    # Fill only the fields the kept record lacks; the first source stays authoritative.
+    changed = False
+    for item in fields(target):
+        if not getattr(target, item.name) and getattr(source, item.name):
+            setattr(target, item.name, getattr(source, item.name))
+            changed = True
+    return changed
+
+
+class ProductIndex:
+    """Deduplicates products across listing sources by style code and URL path.
+
+    ``add`` canonicalizes the product URL and returns True for a new product.
+    A product matching an indexed one on any key is merged into it instead,
+    and its other keys become aliases of the kept record. Fields named in
+    ``overwrite`` take the newer value even when the kept record has one.
+    ``listed`` holds the ids of the kept records added or matched since
+    ``begin_pass``, so a re-listing can tell which products it did not see.
+    """
+
+    def __init__(self):
+        self.by_key: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+        self.duplicates = 0
+        self.updated = 0
+        self.listed: Set[int] = set()
+
+    def begin_pass(self) -> None:
+        with self.lock:
+            self.listed.clear()
+
+    def remove(self, product: Any) -> None:
+        with self.lock:
+            for key in [key for key, kept in self.by_key.items() if kept is product]:
+                del self.by_key[key]
+            self.listed.discard(id(product))
+
+    def __len__(self) -> int:
+        return len({id(product) for product in self.by_key.values()})
+
+    def add(self, product: Any, overwrite: Sequence[str] = ()) -> bool:
+        product.Product_URL = canonical_url(product.Product_URL)
+        keys = product_keys(product)
+        with self.lock:
+            existing = next((self.by_key[key] for key in keys if key in self.by_key), None)
+            if existing is None:
+                for key in keys:
+                    self.by_key[key] = product
+                self.listed.add(id(product))
+                return True
+            self.listed.add(id(existing))
+            changed = False
+            for name in overwrite:
+                if getattr(existing, name) != getattr(product, name):
+                    setattr(existing, name, getattr(product, name))
+                    changed = True
+            self.updated += changed
+            merge_product(existing, product)
+            for key in keys + product_keys(existing):
+                self.by_key.setdefault(key, existing)
+            self.duplicates += 1
+            return False
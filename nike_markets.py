@@ -0,0 +1,143 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+
+from catalog_stats import stats_file_for
+from instrumentation import metrics
+from nike_scraper import CSV_HEADERS, Market, NikeScraperPH
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+MARKETS_FILE = "markets.json"
+MARKET_PROCESSES = 4
+MERGED_HEADERS = ["Market"] + CSV_HEADERS
+
+
+def load_markets(path: str = MARKETS_FILE, codes: Optional[List[str]] = None) -> List[Market]:
+    with open(path, encoding="utf-8") as config_file:
+        config = json.load(config_file)
+
+    markets = [Market.from_dict(item) for item in config.get("markets", [])]
+    if codes:
+        wanted = {code.upper() for code in codes}
+        markets = [market for market in markets if market.code.upper() in wanted]
+    return markets
+
+
+def crawl_market(market_data: dict, output_dir: str, profile: bool = False) -> Tuple[str, List[Dict[str, str]]]:
+    # Runs in a worker process: each market has its own session and pacing.
+    market = Market.from_dict(market_data)
+    code = market.code.lower()
+    # Pool processes are reused across markets; start each with fresh metrics.
+    metrics.reset()
+    scraper = NikeScraperPH(
+        market=market,
+        review_cache_file=os.path.join(output_dir, f"review_cache_{code}.json"),
+        snapshot_file=os.path.join(output_dir, f"listing_snapshot_{code}.json"),
+    )
+    products_file = os.path.join(output_dir, f"products_data_{code}.csv")
+    scraper.run(
+        products_file=products_file,
+        ranking_file=os.path.join(output_dir, f"top_20_rating_review_{code}.csv"),
+        stats_file=stats_file_for(products_file),
+        metrics_file=os.path.join(output_dir, f"metrics_{code}.json"),
+        profile_file=os.path.join(output_dir, f"profile_{code}") if profile else None,
+    )
+    rows = [asdict(product) for product in scraper.get_valid_products()]
+    return market.code, rows
+
+
+class MarketCrawlOrchestrator:
+    def __init__(
+        self,
+        markets: List[Market],
+        output_dir: str = ".",
+        processes: int = MARKET_PROCESSES,
+        profile: bool = False,
+    ):
+        self.markets = markets
+        self.output_dir = output_dir
+        self.processes = processes
+        self.profile = profile
+        self.results: Dict[str, List[Dict[str, str]]] = {}
+        self.failed: List[str] = []
+
+    def run(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        started = time.perf_counter()
+
+        workers = max(1, min(self.processes, len(self.markets)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(crawl_market, asdict(market), self.output_dir, self.profile): market.code
+                for market in self.markets
+            }
+            for future in as_completed(futures):
+                code = futures[future]
+                try:
+                    _, rows = future.result()
+                except Exception as exc:
+                    logger.warning("Market %s failed: %s", code, exc)
+                    self.failed.append(code)
+                    continue
+                self.results[code] = rows
+                logger.info("Market %s finished with %s valid products", code, len(rows))
+
+        logger.info(
+            "Crawled %s markets in %.1fs (%s failed)",
+            len(self.markets),
+            time.perf_counter() - started,
+            len(self.failed),
+        )
+
+    def save_merged_csv(self, filename: str = "products_data_all.csv") -> None:
+        path = os.path.join(self.output_dir, filename)
+        total = 0
+        with open(path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=MERGED_HEADERS)
+            writer.writeheader()
+            for market in self.markets:
+                for row in self.results.get(market.code, []):
+                    writer.writerow({"Market": market.code, **row})
+                    total += 1
+        logger.info("Saved %s products from %s markets to %s", total, len(self.results), path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawl several Nike markets in parallel")
+    parser.add_argument("--config", default=MARKETS_FILE)
+    parser.add_argument("--markets", nargs="*", help="Market codes to crawl (default: all in config)")
+    parser.add_argument("--processes", type=int, default=MARKET_PROCESSES)
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--profile", action="store_true", help="Write profile_<market>.folded/.json per market")
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        help="PDP parse worker processes per market, overriding the config; 0 parses in the calling thread",
+    )
+    args = parser.parse_args()
+
+    markets = load_markets(args.config, args.markets)
+    if not markets:
+        logger.warning("No markets selected")
+        return
+    if args.parse_processes is not None:
+        for market in markets:
+            market.parse_processes = args.parse_processes
+
+    orchestrator = MarketCrawlOrchestrator(markets, args.output_dir, args.processes, args.profile)
+    orchestrator.run()
+    orchestrator.save_merged_csv()
+
+
+if __name__ == "__main__":
+    main()
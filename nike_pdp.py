@@ -0,0 +1,188 @@
+import html
+import json
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Next.js pages embed their props in <script id="__NEXT_DATA__" type="application/json">;
+# older PDP builds assign the Redux store to window.INITIAL_REDUX_STATE instead.
+NEXT_DATA_MARKER = b'id="__NEXT_DATA__"'
+REDUX_STATE_MARKER = b"window.INITIAL_REDUX_STATE="
+SCRIPT_END = b"</script>"
+
+PRODUCT_SIZE_KEYS = ("sizes", "skus")
+REVIEW_RATING_KEYS = ("averageRating", "averageOverallRating", "ratingValue", "rating")
+REVIEW_COUNT_KEYS = ("totalReviews", "reviewCount", "total", "ratingCount", "count")
+AVAILABLE_STATUSES = {"ACTIVE", "AVAILABLE", "IN_STOCK"}
+VOUCHER_TERMS = ("voucher", "promo", "member", "% off")
+VOUCHER_MAX_LENGTH = 120
+# Text between two tags; script bodies are far longer than any voucher line.
+TEXT_NODE_PATTERN = re.compile(rb">([^<>]{3,%d})<" % (VOUCHER_MAX_LENGTH - 1))
+
+
+def extract_state(raw: bytes) -> Optional[dict]:
+    """Return the page's embedded state JSON, or None when the page has none.
+
+    Only byte searches and one ``json.loads``; no HTML tree is built.
+    """
+    start = raw.find(NEXT_DATA_MARKER)
+    if start != -1:
+        start = raw.find(b">", start) + 1
+        end = raw.find(SCRIPT_END, start)
+        if start and end != -1:
+            try:
+                state = json.loads(raw[start:end])
+            except ValueError:
+                state = None
+            if isinstance(state, dict):
+                return state
+
+    start = raw.find(REDUX_STATE_MARKER)
+    if start != -1:
+        text = raw[start + len(REDUX_STATE_MARKER):raw.find(SCRIPT_END, start)].decode("utf-8", errors="replace")
+        try:
+            state, _ = json.JSONDecoder().raw_decode(text.lstrip())
+        except ValueError:
+            return None
+        if isinstance(state, dict):
+            return state
+    return None
+
+
+def walk_dicts(value: object) -> Iterator[Tuple[str, dict]]:
+    # Iterative depth-first walk yielding (parent key path, dict); state trees are deep.
+    stack: List[Tuple[str, object]] = [("", value)]
+    while stack:
+        path, item = stack.pop()
+        if isinstance(item, dict):
+            yield path, item
+            for key, child in reversed(list(item.items())):
+                if isinstance(child, (dict, list)):
+                    stack.append((f"{path}.{key}", child))
+        elif isinstance(item, list):
+            for child in reversed(item):
+                if isinstance(child, (dict, list)):
+                    stack.append((path, child))
+
+
+def find_product(state: dict) -> Optional[dict]:
+    # The page's own colorway sits under selectedProduct; otherwise take the first product.
+    first = None
+    for path, node in walk_dicts(state):
+        if "styleColor" not in node or not any(key in node for key in PRODUCT_SIZE_KEYS):
+            continue
+        if path.endswith(".selectedProduct"):
+            return node
+        if first is None:
+            first = node
+    return first
+
+
+def available_sizes(product: dict) -> List[str]:
+    sizes: List[str] = []
+    if isinstance(product.get("sizes"), list):
+        # Current layout: [{"label": "W 6 / M 4.5", "status": "ACTIVE"}, ...]
+        for size in product["sizes"]:
+            if not isinstance(size, dict) or str(size.get("status", "ACTIVE")).upper() not in AVAILABLE_STATUSES:
+                continue
+            label = size.get("label") or size.get("localizedLabel") or ""
+            if label and label not in sizes:
+                sizes.append(label)
+        return sizes
+
+    # Redux layout: skus carry the labels, availableSkus the stock flags, joined by id.
+    in_stock = {
+        sku.get("skuId") or sku.get("id")
+        for sku in product.get("availableSkus") or []
+        if isinstance(sku, dict) and sku.get("available", True)
+    }
+    for sku in product.get("skus") or []:
+        if not isinstance(sku, dict) or (sku.get("skuId") or sku.get("id")) not in in_stock:
+            continue
+        label = sku.get("localizedSize") or sku.get("nikeSize") or ""
+        if label and label not in sizes:
+            sizes.append(label)
+    return sizes
+
+
+def first_number(node: dict, keys: Tuple[str, ...]) -> Optional[float]:
+    for key in keys:
+        value = node.get(key)
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                continue
+    return None
+
+
+def review_summary(state: dict) -> Optional[Tuple[float, int]]:
+    # Generic names like "total" only count inside a review or rating subtree.
+    for path, node in walk_dicts(state):
+        lowered = path.lower()
+        if "review" not in lowered and "rating" not in lowered:
+            continue
+        rating = first_number(node, REVIEW_RATING_KEYS)
+        count = first_number(node, REVIEW_COUNT_KEYS)
+        if rating is not None and count is not None and 0 <= rating <= 5:
+            return rating, int(count)
+    return None
+
+
+def voucher_text(state: dict) -> str:
+    # Same rule as the rendered-text scan: the first short line naming a promotion.
+    for _, node in walk_dicts(state):
+        for value in node.values():
+            if not isinstance(value, str) or " " not in value or len(value) >= VOUCHER_MAX_LENGTH:
+                continue
+            lower = value.lower()
+            if any(term in lower for term in VOUCHER_TERMS):
+                return value.strip()
+    return ""
+
+
+def markup_voucher_text(raw: bytes) -> str:
+    # Promotions are often only in the rendered banner, not the state.
+    for match in TEXT_NODE_PATTERN.finditer(raw):
+        text = html.unescape(match.group(1).decode("utf-8", errors="replace")).strip()
+        lower = text.lower()
+        if any(term in lower for term in VOUCHER_TERMS):
+            return text
+    return ""
+
+
+def extract_state_details(raw: bytes) -> Dict[str, str]:
+    """Map the embedded PDP state onto ``Product`` fields.
+
+    Returns an empty dict when the page has no state JSON or no product in it.
+    """
+    state = extract_state(raw)
+    if state is None:
+        return {}
+    product = find_product(state)
+    if product is None:
+        return {}
+
+    details: Dict[str, str] = {}
+    sizes = available_sizes(product)
+    if sizes:
+        details["Sizes_Available"] = " | ".join(sizes)
+    if product.get("colorDescription"):
+        details["Color_Shown"] = str(product["colorDescription"])
+    if product.get("styleColor"):
+        details["Style_Code"] = str(product["styleColor"])
+
+    summary = review_summary(state)
+    if summary is not None:
+        rating, count = summary
+        details["Rating_Score"] = f"{rating:.1f}"
+        details["Review_Count"] = str(count)
+
+    vouchers = voucher_text(state) or markup_voucher_text(raw)
+    if vouchers:
+        details["Vouchers"] = vouchers
+    return details
@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+
+# The top-20 ranking (catalog_stats.top_rated) only ranks products with more reviews than this.
+RANKING_MIN_REVIEWS = 150
+# Listing tags that go with a large review count.
+POPULAR_TAGS = ("best seller", "bestseller", "highly rated", "top rated")
+
+
+def colour_count(product: Any) -> int:
+    # "5 Colors" -> 5; popular silhouettes come in more colourways.
+    digits = "".join(ch for ch in product.Available_Colors.split(" ", 1)[0] if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+def enrichment_priority(product: Any, review_count: Optional[int] = None) -> Tuple[int, int, int]:
+    """Sort key for PDP enrichment, highest first.
+
+    Tagged and discounted products are exported to products_data.csv and get
+    their sizes and vouchers only from the PDP, so they lead. Products likely
+    to make the top-20 ranking (a cached review count above the threshold,
+    or a popularity tag) come next. Ties go to the larger review count, then
+    to the product with more colourways.
+    """
+    tagged = bool(product.Product_Tagging.strip())
+    discounted = bool(product.Discount_Price.strip())
+    tier = 4 if tagged and discounted else 1 if tagged or discounted else 0
+    if review_count is not None and review_count > RANKING_MIN_REVIEWS:
+        tier += 2
+    elif any(tag in product.Product_Tagging.lower() for tag in POPULAR_TAGS):
+        tier += 1
+    return tier, review_count or 0, colour_count(product)
+
+
+class EnrichmentBudget:
+    """Wall-time and PDP request cap for one enrichment pass; 0 disables either cap.
+
+    The clock starts at the first ``take``. Once either cap is reached every
+    later ``take`` is refused, so callers that feed products in priority
+    order drop the least valuable ones.
+    """
+
+    def __init__(self, seconds: float = 0.0, requests: int = 0):
+        self.seconds = seconds
+        self.requests = requests
+        self.started: Optional[float] = None
+        self.granted = 0
+        self.denied = 0
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            if self.started is None:
+                self.started = now
+            if (self.requests and self.granted >= self.requests) or (
+                self.seconds and now - self.started >= self.seconds
+            ):
+                self.denied += 1
+                return False
+            self.granted += 1
+            return True
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started if self.started is not None else 0.0
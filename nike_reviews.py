@@ -0,0 +1,139 @@
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from http_client import HttpClient, read_json
+from instrumentation import metrics
+from nike_pdp import first_number
+from ttl_cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+# The PDP loads its review widget from Bazaarvoice; the statistics endpoint
+# answers for up to 100 products per request.
+REVIEWS_URL = "https://api.bazaarvoice.com/data/statistics.json"
+REVIEWS_API_VERSION = "5.4"
+REVIEWS_PASSKEY_ENV = "NIKE_REVIEWS_PASSKEY"
+REVIEW_BATCH_SIZE = 100
+REVIEW_RATE = 2.0
+# Summaries move slowly; an hourly ranking refresh only refetches expired codes.
+REVIEW_TTL = 3600
+REVIEW_CACHE_SIZE = 50000
+REVIEW_CACHE_FILE = "review_cache.json"
+
+SUMMARY_RATING_KEYS = ("AverageOverallRating", "averageOverallRating", "averageRating", "rating")
+SUMMARY_COUNT_KEYS = ("TotalReviewCount", "totalReviewCount", "totalReviews", "reviewCount", "total")
+
+
+class ReviewCache(TTLCache):
+    """Review summaries by style code; see ``TTLCache``."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = REVIEW_TTL, max_entries: int = REVIEW_CACHE_SIZE):
+        super().__init__("reviews", path, ttl, max_entries)
+
+
+def parse_statistics(payload: dict) -> Dict[str, Dict[str, str]]:
+    # {"Results": [{"ProductStatistics": {"ProductId": ..., "ReviewStatistics": {...}}}]}
+    summaries: Dict[str, Dict[str, str]] = {}
+    for result in payload.get("Results") or []:
+        statistics = result.get("ProductStatistics") or result
+        code = statistics.get("ProductId") or statistics.get("productId")
+        if not code:
+            continue
+        review_stats = statistics.get("ReviewStatistics") or statistics.get("reviewStatistics") or statistics
+        rating = first_number(review_stats, SUMMARY_RATING_KEYS)
+        count = first_number(review_stats, SUMMARY_COUNT_KEYS)
+        summaries[str(code).upper()] = {
+            "Rating_Score": f"{rating:.1f}" if rating is not None and count else "",
+            "Review_Count": str(int(count or 0)),
+        }
+    return summaries
+
+
+class ReviewSummaryFetcher:
+    """Rating and review count per style code, fetched in batches and cached.
+
+    Style codes already in the cache are answered locally; the rest are
+    requested ``batch_size`` at a time. Codes the backend does not know are
+    cached as unreviewed, so they are not asked for again until they expire.
+    """
+
+    def __init__(
+        self,
+        http: HttpClient,
+        cache: Optional[ReviewCache] = None,
+        url: str = REVIEWS_URL,
+        passkey: Optional[str] = None,
+        batch_size: int = REVIEW_BATCH_SIZE,
+    ):
+        self.http = http
+        self.cache = cache or ReviewCache()
+        self.url = url
+        self.passkey = passkey if passkey is not None else os.environ.get(REVIEWS_PASSKEY_ENV, "")
+        self.batch_size = max(1, batch_size)
+        self.requests = 0
+
+    def fetch_batch(self, codes: List[str]) -> Optional[Dict[str, Dict[str, str]]]:
+        params = [
+            ("apiversion", REVIEWS_API_VERSION),
+            ("passkey", self.passkey),
+            ("stats", "Reviews"),
+            ("filter", "ProductId:" + ",".join(codes)),
+        ]
+        response = self.http.get(self.url, params=params, timeout=30)
+        self.requests += 1
+        if response.status_code != 200:
+            logger.warning("Review summaries returned status %s for %s codes", response.status_code, len(codes))
+            # Not cached: a bad passkey or an outage must not mark products unreviewed.
+            response.close()
+            return None
+        with metrics.timer("parse_seconds", kind="review_statistics"):
+            payload = read_json(response)
+        if payload.get("HasErrors"):
+            logger.warning("Review summaries failed: %s", payload.get("Errors"))
+            return None
+        return parse_statistics(payload)
+
+    def summaries(self, style_codes: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        started = time.perf_counter()
+        found: Dict[str, Dict[str, str]] = {}
+        missing: List[str] = []
+        for code in dict.fromkeys(code.strip().upper() for code in style_codes if code and code.strip()):
+            summary = self.cache.get(code)
+            if summary is None:
+                missing.append(code)
+            else:
+                found[code] = summary
+
+        cached = len(found)
+        if missing and not self.passkey:
+            logger.warning("No reviews passkey (%s); %s style codes left unrated", REVIEWS_PASSKEY_ENV, len(missing))
+            missing = []
+
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            try:
+                fetched = self.fetch_batch(batch)
+            except Exception as exc:
+                logger.warning("Review summary batch failed: %s", exc)
+                continue
+            if fetched is None:
+                continue
+            for code in batch:
+                summary = fetched.get(code, {"Rating_Score": "", "Review_Count": "0"})
+                self.cache.put(code, summary)
+                found[code] = summary
+            metrics.inc("items_total", len(batch), stage="reviews")
+
+        self.cache.save()
+        logger.info(
+            "Review summaries for %s style codes in %.1fs (%s from cache, %s requests)",
+            len(found),
+            time.perf_counter() - started,
+            cached,
+            self.requests,
+        )
+        return found
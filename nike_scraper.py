@@ -1,21 +1,27 @@
+import argparse
 import csv
+import itertools
 import json
 import logging
+import queue
 import re
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
-from typing import List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
 
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.core.os_manager import ChromeType
+from catalog_stats import STATS_FILE, compute_stats, save_stats, top_expensive, top_rated
+from http_client import Http2Session, HttpClient, build_session, read_json
+from instrumentation import metrics
+from listing_snapshot import ListingSnapshot, content_hash, page_key
+from nike_dedup import ProductIndex, canonical_url
+from nike_pdp import extract_state_details
+from nike_priority import EnrichmentBudget, enrichment_priority
+from nike_reviews import REVIEW_CACHE_FILE, REVIEW_RATE, REVIEWS_URL, ReviewCache, ReviewSummaryFetcher
+from parse_pipeline import PARSE_PROCESSES, FetchParsePipeline
+from profiler import profiled
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -51,6 +57,16 @@ PAGE_SIZE = 60
 LISTING_DELAY = 0.6
 DETAIL_DELAY = 0.5
 DETAIL_WORKERS = 4
+# Listed products waiting for enrichment. This bounds the hand-off between the
+# stages, not the catalog: every product stays in self.products until export,
+# because the ranking, stats and cross-loader dedup need all of them.
+# The queue hands out the highest-priority product first.
+STREAM_QUEUE_SIZE = 200
+# How long a failed enrichment stage waits for the listing thread to wind down.
+LISTING_JOIN_TIMEOUT = 30.0
+LISTING_SNAPSHOT_FILE = "listing_snapshot.json"
+# Listing-owned fields a re-listing replaces on products that are already known.
+LISTING_REFRESH_FIELDS = ["Original_Price", "Discount_Price", "Product_Tagging", "Available_Colors"]
 
 
 CSV_HEADERS = [
@@ -71,6 +87,36 @@ CSV_HEADERS = [
 ]
 
 
+@dataclass
+class Market:
+    code: str = "PH"
+    country: str = "PH"
+    marketplace: str = "PH"
+    languages: List[str] = field(default_factory=lambda: list(LANGUAGES))
+    currency: str = "₱"
+    currency_code: str = "PHP"
+    channel_ids: List[str] = field(default_factory=lambda: list(CHANNEL_IDS))
+    base_url: str = "https://www.nike.com/ph/w"
+    browse_paths: List[str] = field(default_factory=lambda: ["/ph/w", "/w"])
+    gender: str = "Women"
+    listing_delay: float = LISTING_DELAY
+    detail_delay: float = DETAIL_DELAY
+    detail_workers: int = DETAIL_WORKERS
+    parse_processes: int = PARSE_PROCESSES
+    http2: bool = False
+    reviews_url: str = REVIEWS_URL
+    # Empty means the NIKE_REVIEWS_PASSKEY environment variable.
+    reviews_passkey: str = ""
+    # Caps on one enrichment pass; 0 means unlimited.
+    enrichment_seconds: float = 0.0
+    enrichment_requests: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Market":
+        known = {key: value for key, value in data.items() if key in cls.__dataclass_fields__}
+        return cls(**known)
+
+
 @dataclass
 class Product:
     Product_URL: str = ""
@@ -89,23 +135,194 @@ class Product:
     Review_Count: str = ""
 
 
+def extract_pdp_details(raw: bytes) -> dict:
+    # Pure function of the page bytes so it can run in a parse worker process.
+    # Fast path: the embedded state JSON has SKU availability and the review
+    # summary, which the server-rendered markup usually lacks.
+    details = extract_state_details(raw)
+    if details.get("Sizes_Available") or details.get("Style_Code"):
+        return details
+    html_details = extract_html_details(raw)
+    html_details.update(details)
+    return html_details
+
+
+def extract_html_details(raw: bytes) -> dict:
+    from bs4 import BeautifulSoup
+
+    details = {}
+    soup = BeautifulSoup(raw.decode("utf-8", errors="replace"), "html.parser")
+    page_text = soup.get_text("\n", strip=True)
+
+    sizes = []
+    for size_elem in soup.select("li[data-qa='size-available'], button[data-qa='size-available']"):
+        text = size_elem.get_text(strip=True)
+        if text and text not in sizes:
+            sizes.append(text)
+    if sizes:
+        details["Sizes_Available"] = " | ".join(sizes)
+
+    color_match = re.search(r"(?:Colour|Color) Shown:\s*([^\n]+)", page_text, re.IGNORECASE)
+    if color_match:
+        details["Color_Shown"] = color_match.group(1).strip()
+
+    style_match = re.search(r"Style(?:\s*Code)?:\s*([A-Za-z0-9-]+)", page_text, re.IGNORECASE)
+    if style_match:
+        details["Style_Code"] = style_match.group(1).strip()
+
+    review_match = re.search(r"([0-5](?:\.\d)?)\s*\((\d+)\s*Reviews?\)", page_text)
+    if review_match:
+        details["Rating_Score"] = review_match.group(1)
+        details["Review_Count"] = review_match.group(2)
+    else:
+        alt_review_match = re.search(r"(\d+)\s*Reviews?", page_text)
+        alt_rating_match = re.search(r"([0-5](?:\.\d)?)\s*Rating", page_text)
+        if alt_review_match:
+            details["Review_Count"] = alt_review_match.group(1)
+        if alt_rating_match:
+            details["Rating_Score"] = alt_rating_match.group(1)
+
+    voucher_candidates = []
+    for line in page_text.split("\n"):
+        lower = line.lower()
+        if any(term in lower for term in ["voucher", "promo", "member", "% off"]):
+            if len(line) < 120:
+                voucher_candidates.append(line.strip())
+    if voucher_candidates:
+        details["Vouchers"] = voucher_candidates[0]
+
+    return details
+
+
 class NikeScraperPH:
-    def __init__(self, base_url: str = "https://www.nike.com/ph/w"):
-        self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        market: Optional[Market] = None,
+        review_cache_file: Optional[str] = REVIEW_CACHE_FILE,
+        snapshot_file: Optional[str] = LISTING_SNAPSHOT_FILE,
+    ):
+        self.market = market or Market()
+        self.base_url = base_url or self.market.base_url
+        headers = dict(HEADERS, **{"Accept-Language": f"{self.market.languages[0]},en;q=0.9"})
+        # One session for listing and enrichment so keep-alive connections carry over.
+        if self.market.http2:
+            self.session = Http2Session(headers, max_connections=self.market.detail_workers + 2)
+        else:
+            self.session = build_session(
+                headers,
+                pool_sizes={
+                    "api.nike.com": self.market.detail_workers + 2,
+                    "www.nike.com": self.market.detail_workers + 2,
+                },
+            )
+        # The listing/detail delays are the starting per-host budgets; AIMD adjusts from there.
+        self.http = HttpClient(
+            self.session,
+            host_rates={
+                "api.nike.com": 1.0 / self.market.listing_delay,
+                "www.nike.com": self.market.detail_workers / self.market.detail_delay,
+                urlparse(self.market.reviews_url).netloc: REVIEW_RATE,
+            },
+        )
+        self.reviews = ReviewSummaryFetcher(
+            self.http,
+            ReviewCache(review_cache_file),
+            url=self.market.reviews_url,
+            passkey=self.market.reviews_passkey or None,
+        )
         self.products: List[Product] = []
+        # Shared by every listing source, so fallbacks only add what is new.
+        self.index = ProductIndex()
+        # Listing pages unchanged since the last run hand back last run's enriched products.
+        self.snapshot = ListingSnapshot(snapshot_file)
+        self.carried: Set[str] = set()
+        # Products the enrichment budget skipped; they keep listing data only.
+        self.unenriched: Set[str] = set()
+        self.product_sink: Optional[Callable[[Product], None]] = None
+        # Set while re-listing a warm catalog, so known products take the new prices.
+        self.refreshing = False
         self.empty_tagging_count = 0
 
+    def add_product(self, product: Product, carried: bool = False) -> bool:
+        # Duplicates are merged into the kept record and never reach enrichment;
+        # carried-forward products are already enriched.
+        if not product.Product_URL:
+            return False
+        if not self.index.add(product, LISTING_REFRESH_FIELDS if self.refreshing else ()):
+            metrics.inc("duplicates_total", stage="listing")
+            return False
+        self.products.append(product)
+        metrics.inc("items_total", stage="listing")
+        if carried:
+            self.carried.add(product.Product_URL)
+            metrics.inc("carried_total", stage="listing")
+        elif self.product_sink is not None:
+            self.product_sink(product)
+        return True
+
+    def fetch_listing_page(
+        self,
+        url: str,
+        params: Optional[List[Tuple[str, str]]] = None,
+        label: str = "Listing",
+    ) -> Optional[Tuple[List[Product], bool]]:
+        """Products of one listing page and whether they were carried forward.
+
+        A page whose ETag or body hash matches the snapshot is not parsed; its
+        products come back from the last run. None means the request failed.
+        """
+        key = page_key(url, params)
+        etag = self.snapshot.etag(key)
+        try:
+            response = self.http.get(url, params=params, timeout=30, headers={"If-None-Match": etag} if etag else None)
+            if response.status_code == 304:
+                records = self.snapshot.carry(key)
+                if records is not None:
+                    return [Product(**record) for record in records], True
+                response = self.http.get(url, params=params, timeout=30)
+        except Exception as exc:
+            logger.warning("%s request failed: %s", label, exc)
+            return None
+
+        if response.status_code != 200:
+            logger.warning("%s status %s", label, response.status_code)
+            response.close()
+            return None
+
+        # Buffered rather than streamed: the hash decides whether to parse at all.
+        body = response.content
+        digest = content_hash(body)
+        records = self.snapshot.carry(key, digest)
+        if records is not None:
+            return [Product(**record) for record in records], True
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            logger.warning("%s returned non-JSON response", label)
+            return None
+
+        products = self.parse_products_from_payload(payload)
+        if not products:
+            logger.info("%s returned 0 products; keys: %s", label, list(payload.keys()) if isinstance(payload, dict) else [])
+        self.snapshot.record(
+            key,
+            digest,
+            response.headers.get("ETag", ""),
+            [canonical_url(product.Product_URL) for product in products if product.Product_URL],
+        )
+        return products, False
+
     def fetch_html(self, url: str) -> str:
-        response = self.session.get(url, timeout=30)
+        response = self.http.get(url, timeout=30)
         response.raise_for_status()
         return response.text
 
     def price_to_float(self, price_text: str) -> Optional[float]:
         if not price_text:
             return None
-        cleaned = price_text.replace("₱", "").replace(",", "").strip()
+        cleaned = price_text.replace(self.market.currency, "").replace(",", "").strip()
         try:
             return float(cleaned)
         except ValueError:
@@ -114,15 +331,16 @@ class NikeScraperPH:
     def format_price(self, value: Optional[object]) -> str:
         if value is None:
             return ""
+        currency = self.market.currency
         if isinstance(value, (int, float)):
-            return f"₱{value:,.2f}"
+            return f"{currency}{value:,.2f}"
         text = str(value).strip()
         if not text:
             return ""
-        if text.startswith("₱"):
+        if text.startswith(currency):
             return text
         if re.search(r"\d", text):
-            return f"₱{text}"
+            return f"{currency}{text}"
         return text
 
     def parse_price_value(self, value: Optional[object]) -> Optional[float]:
@@ -155,17 +373,17 @@ class NikeScraperPH:
     def build_api_params(self, anchor: int, include_filter: bool, language: str, path: str) -> List[Tuple[str, str]]:
         params = [
             ("queryid", "products"),
-            ("country", "PH"),
+            ("country", self.market.country),
             ("language", language),
-            ("marketplace", "PH"),
+            ("marketplace", self.market.marketplace),
             ("channel", "web"),
             ("count", str(PAGE_SIZE)),
             ("anchor", str(anchor)),
-            ("consumerChannelId", CHANNEL_IDS[0]),
+            ("consumerChannelId", self.market.channel_ids[0]),
             ("path", path),
         ]
         if include_filter:
-            params.append(("filter", "gender:Women"))
+            params.append(("filter", f"gender:{self.market.gender}"))
         return params
 
     def build_rollup_params(
@@ -176,7 +394,7 @@ class NikeScraperPH:
         channel_id: str,
     ) -> List[Tuple[str, str]]:
         params = [
-            ("filter", "marketplace(PH)"),
+            ("filter", f"marketplace({self.market.marketplace})"),
             ("filter", f"language({language})"),
             ("filter", f"channelId({channel_id})"),
             ("filter", "employeePrice(false)"),
@@ -185,7 +403,7 @@ class NikeScraperPH:
             ("count", str(PAGE_SIZE)),
         ]
         if include_gender:
-            params.append(("filter", "gender(Women)"))
+            params.append(("filter", f"gender({self.market.gender})"))
         return params
 
     def extract_tags(self, info: dict) -> str:
@@ -289,54 +507,37 @@ class NikeScraperPH:
                 for item in value:
                     walk(item)
 
-        if items:
-            walk(items)
-        else:
-            walk(payload)
+        with metrics.timer("parse_seconds", kind="listing_payload"):
+            if items:
+                walk(items)
+            else:
+                walk(payload)
 
         return products
 
     def load_products_from_rollup_api(self) -> None:
-        seen_urls: Set[str] = set()
         anchor = 0
         page = 1
 
         for base_url in ROLLUP_BASE_URLS:
-            for language in LANGUAGES:
-                for channel_id in CHANNEL_IDS:
+            for language in self.market.languages:
+                for channel_id in self.market.channel_ids:
                     for include_gender in [True, False]:
                         while True:
                             params = self.build_rollup_params(anchor, include_gender, language, channel_id)
-                            try:
-                                response = self.session.get(base_url, params=params, timeout=30)
-                            except Exception as exc:
-                                logger.warning("Rollup request failed: %s", exc)
+                            page_result = self.fetch_listing_page(base_url, params, "Rollup")
+                            if page_result is None:
                                 break
-
-                            if response.status_code != 200:
-                                logger.warning("Rollup status %s", response.status_code)
-                                break
-
-                            try:
-                                payload = response.json()
-                            except Exception:
-                                logger.warning("Rollup returned non-JSON response")
-                                break
-
-                            page_products = self.parse_products_from_payload(payload)
+                            page_products, carried = page_result
                             if not page_products:
-                                logger.info("Rollup returned 0 products; keys: %s", list(payload.keys()))
                                 break
 
                             for product in page_products:
-                                if product.Product_URL and product.Product_URL not in seen_urls:
-                                    seen_urls.add(product.Product_URL)
-                                    self.products.append(product)
+                                self.add_product(product, carried)
 
-                            logger.info("Rollup page %s: collected %s products", page, len(seen_urls))
+                            logger.info("Rollup page %s: collected %s products", page, len(self.products))
                             anchor += PAGE_SIZE
                             page += 1
-                            time.sleep(LISTING_DELAY)
 
                         if self.products:
                             return
@@ -360,7 +561,7 @@ class NikeScraperPH:
         params = parse_qs(parsed.query)
         params["count"] = [str(PAGE_SIZE)]
 
-        seen_urls: Set[str] = set()
+        listed: Set[str] = set()
         anchor = 0
         page = 1
 
@@ -369,53 +570,38 @@ class NikeScraperPH:
             query = urlencode(params, doseq=True)
             url = urlunparse(parsed._replace(query=query))
 
-            try:
-                response = self.session.get(url, timeout=30)
-            except Exception as exc:
-                logger.warning("Discovered rollup request failed: %s", exc)
+            page_result = self.fetch_listing_page(url, label="Discovered rollup")
+            if page_result is None:
                 break
-
-            if response.status_code != 200:
-                logger.warning("Discovered rollup status %s", response.status_code)
-                break
-
-            try:
-                payload = response.json()
-            except Exception:
-                logger.warning("Discovered rollup returned non-JSON response")
-                break
-
-            page_products = self.parse_products_from_payload(payload)
+            page_products, carried = page_result
             if not page_products:
                 break
 
-            before = len(seen_urls)
+            # Stop once a page lists nothing new to this pass (the API ignores the anchor).
+            page_urls = {canonical_url(product.Product_URL) for product in page_products}
             for product in page_products:
-                if product.Product_URL and product.Product_URL not in seen_urls:
-                    seen_urls.add(product.Product_URL)
-                    self.products.append(product)
+                self.add_product(product, carried)
 
-            logger.info("Discovered rollup page %s: collected %s products", page, len(seen_urls))
-            if len(seen_urls) == before:
+            logger.info("Discovered rollup page %s: collected %s products", page, len(self.products))
+            if page_urls <= listed:
                 break
+            listed |= page_urls
 
             anchor += PAGE_SIZE
             page += 1
-            time.sleep(LISTING_DELAY)
 
     def load_products_from_browse_api(self) -> None:
-        seen_urls: Set[str] = set()
         anchor = 0
         page = 1
 
         for base_url in BROWSE_BASE_URLS:
-            for language in LANGUAGES:
-                for path in ["/ph/w", "/w"]:
+            for language in self.market.languages:
+                for path in self.market.browse_paths:
                     for include_filter in [True, False]:
                         while True:
                             params = self.build_api_params(anchor, include_filter, language, path)
                             try:
-                                response = self.session.get(base_url, params=params, timeout=30)
+                                response = self.http.get(base_url, params=params, timeout=30)
                             except Exception as exc:
                                 logger.warning("Browse request failed: %s", exc)
                                 break
@@ -425,7 +611,7 @@ class NikeScraperPH:
                                 break
 
                             try:
-                                payload = response.json()
+                                payload = read_json(response)
                             except Exception:
                                 logger.warning("Browse returned non-JSON response")
                                 break
@@ -436,14 +622,11 @@ class NikeScraperPH:
                                 break
 
                             for product in page_products:
-                                if product.Product_URL and product.Product_URL not in seen_urls:
-                                    seen_urls.add(product.Product_URL)
-                                    self.products.append(product)
+                                self.add_product(product)
 
-                            logger.info("Browse page %s: collected %s products", page, len(seen_urls))
+                            logger.info("Browse page %s: collected %s products", page, len(self.products))
                             anchor += PAGE_SIZE
                             page += 1
-                            time.sleep(LISTING_DELAY)
 
                         if self.products:
                             return
@@ -473,14 +656,20 @@ class NikeScraperPH:
                 except Exception:
                     pass
 
-        seen_urls: Set[str] = set()
         for payload in payloads:
             for product in self.parse_products_from_payload(payload):
-                if product.Product_URL and product.Product_URL not in seen_urls:
-                    seen_urls.add(product.Product_URL)
-                    self.products.append(product)
+                self.add_product(product)
 
     def load_products_from_selenium(self) -> None:
+        # Rarely reached fallback: keep selenium, webdriver_manager and bs4 off the startup path.
+        from bs4 import BeautifulSoup
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.by import By
+        from webdriver_manager.chrome import ChromeDriverManager
+        from webdriver_manager.core.os_manager import ChromeType
+
         chrome_options = Options()
         chrome_options.add_argument("--headless=new")
         chrome_options.add_argument("--no-sandbox")
@@ -529,7 +718,6 @@ class NikeScraperPH:
             except Exception:
                 pass
 
-        seen_urls: Set[str] = set(p.Product_URL for p in self.products if p.Product_URL)
         cards = soup.select("div.product-card")
         for card in cards:
             product = Product()
@@ -558,8 +746,9 @@ class NikeScraperPH:
             if desc_elem:
                 product.Product_Description = desc_elem.get_text(strip=True)
 
-            price_lines = [line for line in card.get_text("\n", strip=True).split("\n") if "₱" in line]
-            cleaned = [self.format_price(line.replace("PHP", "").strip()) for line in price_lines]
+            currency = self.market.currency
+            price_lines = [line for line in card.get_text("\n", strip=True).split("\n") if currency in line]
+            cleaned = [self.format_price(line.replace(self.market.currency_code, "").strip()) for line in price_lines]
             if len(cleaned) >= 2:
                 values = [(self.price_to_float(p) or 0.0, p) for p in cleaned]
                 values.sort(key=lambda x: x[0])
@@ -572,80 +761,212 @@ class NikeScraperPH:
             if colors_elem and "color" in colors_elem.get_text(strip=True).lower():
                 product.Available_Colors = colors_elem.get_text(strip=True)
 
-            if product.Product_URL and product.Product_URL not in seen_urls:
-                seen_urls.add(product.Product_URL)
-                self.products.append(product)
+            self.add_product(product)
 
     def load_all_products(self) -> None:
-        self.load_products_from_discovered_rollup()
-        self.load_products_from_rollup_api()
-        if not self.products:
-            self.load_products_from_browse_api()
-        if not self.products:
-            self.load_products_from_html()
-        if not self.products:
-            self.load_products_from_selenium()
-
-        logger.info("Finished collecting listing data: %s products", len(self.products))
+        with metrics.stage("listing"):
+            self.load_products_from_discovered_rollup()
+            self.load_products_from_rollup_api()
+            if not self.products:
+                self.load_products_from_browse_api()
+            if not self.products:
+                self.load_products_from_html()
+            if not self.products:
+                with metrics.stage("selenium_listing"):
+                    self.load_products_from_selenium()
+
+        logger.info(
+            "Finished collecting listing data: %s products (%s duplicates merged)",
+            len(self.products),
+            self.index.duplicates,
+        )
 
-    def fetch_product_details(self, product: Product) -> None:
+    def fetch_product_page(self, product: Product) -> Optional[bytes]:
         if not product.Product_URL:
-            return
+            return None
+
+        response = self.http.get(product.Product_URL, timeout=20)
+        if response.status_code != 200:
+            return None
+        return response.content
+
+    def apply_product_details(self, product: Product, details: dict) -> None:
+        for key, value in details.items():
+            setattr(product, key, value)
 
+    def fetch_product_details(self, product: Product) -> None:
         try:
-            response = self.session.get(product.Product_URL, timeout=20)
-            if response.status_code != 200:
+            raw = self.fetch_product_page(product)
+            if raw is None:
                 return
+            with metrics.timer("parse_seconds", kind="extract_pdp_details"):
+                details = extract_pdp_details(raw)
+            self.apply_product_details(product, details)
+            metrics.inc("items_total", stage="enrichment")
+        except Exception:
+            return
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            page_text = soup.get_text("\n", strip=True)
-
-            sizes = []
-            for size_elem in soup.select("li[data-qa='size-available'], button[data-qa='size-available']"):
-                text = size_elem.get_text(strip=True)
-                if text and text not in sizes:
-                    sizes.append(text)
-            if sizes:
-                product.Sizes_Available = " | ".join(sizes)
-
-            color_match = re.search(r"(?:Colour|Color) Shown:\s*([^\n]+)", page_text, re.IGNORECASE)
-            if color_match:
-                product.Color_Shown = color_match.group(1).strip()
-
-            style_match = re.search(r"Style(?:\s*Code)?:\s*([A-Za-z0-9-]+)", page_text, re.IGNORECASE)
-            if style_match:
-                product.Style_Code = style_match.group(1).strip()
-
-            review_match = re.search(r"([0-5](?:\.\d)?)\s*\((\d+)\s*Reviews?\)", page_text)
-            if review_match:
-                product.Rating_Score = review_match.group(1)
-                product.Review_Count = review_match.group(2)
+    def enrichment_priority(self, product: Product) -> Tuple[int, int, int]:
+        # Review counts from earlier runs hint at ranking candidates before their PDP is fetched.
+        code = product.Style_Code.strip().upper()
+        summary = self.reviews.cache.get(code, record=False) if code else None
+        count = summary.get("Review_Count", "") if summary else ""
+        return enrichment_priority(product, int(count) if count.isdigit() else None)
+
+    def enrichment_budget(self) -> EnrichmentBudget:
+        return EnrichmentBudget(self.market.enrichment_seconds, self.market.enrichment_requests)
+
+    def within_budget(self, products: Iterable[Product], budget: EnrichmentBudget) -> Iterator[Product]:
+        # Consumes the whole iterable, so a streaming listing is never left blocked.
+        for product in products:
+            if budget.take():
+                yield product
             else:
-                alt_review_match = re.search(r"(\d+)\s*Reviews?", page_text)
-                alt_rating_match = re.search(r"([0-5](?:\.\d)?)\s*Rating", page_text)
-                if alt_review_match:
-                    product.Review_Count = alt_review_match.group(1)
-                if alt_rating_match:
-                    product.Rating_Score = alt_rating_match.group(1)
-
-            voucher_candidates = []
-            for line in page_text.split("\n"):
-                lower = line.lower()
-                if any(term in lower for term in ["voucher", "promo", "member", "% off"]):
-                    if len(line) < 120:
-                        voucher_candidates.append(line.strip())
-            if voucher_candidates:
-                product.Vouchers = voucher_candidates[0]
-
-            time.sleep(DETAIL_DELAY)
+                self.unenriched.add(product.Product_URL)
 
-        except Exception:
+    def log_budget(self, budget: EnrichmentBudget) -> None:
+        if not budget.denied:
             return
+        metrics.inc("budget_skipped_total", budget.denied, stage="enrichment")
+        exportable = sum(1 for p in self.get_valid_products() if p.Product_URL in self.unenriched)
+        logger.warning(
+            "Enrichment budget spent after %s PDP requests in %.0fs; %s products keep listing data only "
+            "(%s of them exported)",
+            budget.granted,
+            budget.elapsed(),
+            budget.denied,
+            exportable,
+        )
+
+    def enrich_products(self, products: Optional[List[Product]] = None) -> None:
+        # Defaults to everything the listing did not carry forward already enriched.
+        pending = products if products is not None else [p for p in self.products if p.Product_URL not in self.carried]
+        pending = sorted(pending, key=self.enrichment_priority, reverse=True)
+        self.unenriched.difference_update(p.Product_URL for p in pending)
+        budget = self.enrichment_budget()
+        logger.info("Fetching product details for %s products", len(pending))
+        with metrics.stage("enrichment"):
+            if self.market.parse_processes > 0:
+                pipeline = FetchParsePipeline(
+                    self.fetch_product_page,
+                    extract_pdp_details,
+                    fetch_workers=self.market.detail_workers,
+                    parse_processes=self.market.parse_processes,
+                )
+                for product, details in pipeline.run(self.within_budget(pending, budget)):
+                    self.apply_product_details(product, details)
+                    metrics.inc("items_total", stage="enrichment")
+            else:
+                def fetch_within_budget(product: Product) -> None:
+                    # Checked in the worker: map() submits everything up front.
+                    if budget.take():
+                        self.fetch_product_details(product)
+                    else:
+                        self.unenriched.add(product.Product_URL)
+
+                with ThreadPoolExecutor(max_workers=self.market.detail_workers) as executor:
+                    list(executor.map(fetch_within_budget, pending))
+        self.log_budget(budget)
+
+    def crawl_streaming(self) -> None:
+        product_queue: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=STREAM_QUEUE_SIZE)
+        # Highest priority first; the sequence number breaks ties and keeps Products uncompared.
+        sequence = itertools.count()
+        last = (1,)
+        # Set when enrichment stops; listing then stops queueing products.
+        cancelled = threading.Event()
+
+        def enqueue(product: Product) -> None:
+            if cancelled.is_set():
+                return
+            order = tuple(-value for value in self.enrichment_priority(product))
+            product_queue.put((order, next(sequence), product))
+
+        def list_products() -> None:
+            try:
+                self.load_all_products()
+            except Exception as exc:
+                logger.warning("Listing stage failed: %s", exc)
+            finally:
+                product_queue.put((last, next(sequence), None))
+
+        def queued_products() -> Iterator[Product]:
+            while True:
+                _, _, product = product_queue.get()
+                if product is None:
+                    return
+                yield product
+
+        # Listing blocks on a full queue, so enrichment sets the pace for both stages.
+        # While it is full, each newly listed product that outranks the backlog is next.
+        self.product_sink = enqueue
+        self.unenriched.clear()
+        budget = self.enrichment_budget()
+        listing = threading.Thread(target=list_products, daemon=True)
+        listing.start()
+
+        pipeline = FetchParsePipeline(
+            self.fetch_product_page,
+            extract_pdp_details,
+            fetch_workers=self.market.detail_workers,
+            parse_processes=self.market.parse_processes,
+        )
+        enriched = 0
+        try:
+            with metrics.stage("enrichment"):
+                for product, details in pipeline.run(self.within_budget(queued_products(), budget)):
+                    self.apply_product_details(product, details)
+                    metrics.inc("items_total", stage="enrichment")
+                    enriched += 1
+        finally:
+            # If enrichment failed nothing reads the queue any more: drain it so a
+            # listing thread blocked on a full queue can see the cancel and finish.
+            cancelled.set()
+            deadline = time.monotonic() + LISTING_JOIN_TIMEOUT
+            while listing.is_alive() and time.monotonic() < deadline:
+                try:
+                    product_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            listing.join(timeout=max(0.0, deadline - time.monotonic()))
+            if listing.is_alive():
+                logger.warning("Listing thread still running after %.0fs; leaving it behind", LISTING_JOIN_TIMEOUT)
+            # Release fetch threads still waiting for a product.
+            for _ in range(self.market.detail_workers):
+                try:
+                    product_queue.put_nowait((last, next(sequence), None))
+                except queue.Full:
+                    break
+            self.product_sink = None
+        self.log_budget(budget)
+
+        logger.info(
+            "Streamed %s products, enriched %s, carried forward %s unchanged",
+            len(self.products),
+            enriched,
+            len(self.carried),
+        )
+        logger.info("Connection reuse: %s", self.http.connection_stats())
+
+    def refresh_review_summaries(self) -> None:
+        with metrics.stage("reviews"):
+            summaries = self.reviews.summaries(p.Style_Code for p in self.products)
+        for product in self.products:
+            summary = summaries.get(product.Style_Code.strip().upper())
+            if not summary:
+                continue
+            # Unknown to the reviews backend; keep whatever the PDP showed.
+            if summary["Review_Count"] == "0" and product.Review_Count:
+                continue
+            self.apply_product_details(product, summary)
 
-    def enrich_products(self) -> None:
-        logger.info("Fetching product details for %s products", len(self.products))
-        with ThreadPoolExecutor(max_workers=DETAIL_WORKERS) as executor:
-            list(executor.map(self.fetch_product_details, self.products))
+    def load_products_csv(self, filename: str) -> None:
+        with open(filename, newline="", encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                product = Product(**{key: row.get(key) or "" for key in CSV_HEADERS})
+                if self.index.add(product):
+                    self.products.append(product)
+        logger.info("Loaded %s products from %s", len(self.products), filename)
 
     def count_empty_tagging(self) -> None:
         self.empty_tagging_count = sum(1 for p in self.products if not p.Product_Tagging.strip())
@@ -671,66 +992,16 @@ class NikeScraperPH:
         logger.info("Saved %s products to %s", len(products), filename)
 
     def print_top_expensive(self, products: List[Product], limit: int = 10) -> None:
-        priced = []
-        for product in products:
-            price_val = self.price_to_float(product.Discount_Price)
-            if price_val is not None:
-                priced.append((price_val, product))
-
-        priced.sort(key=lambda x: x[0], reverse=True)
-
         print("\nTop 10 Most Expensive Products:")
         print("-" * 80)
-        for idx, (_, product) in enumerate(priced[:limit], 1):
-            print(f"{idx}. {product.Product_Name}")
-            print(f"   Final Price: {product.Discount_Price}")
-            print(f"   URL: {product.Product_URL}")
+        for entry in top_expensive((vars(product) for product in products), limit):
+            print(f"{entry['Rank']}. {entry['Product_Name']}")
+            print(f"   Final Price: {entry['Discount_Price']}")
+            print(f"   URL: {entry['Product_URL']}")
             print()
 
     def save_top_20_rating_review(self, filename: str = "top_20_rating_review.csv") -> None:
-        eligible = []
-        for product in self.products:
-            try:
-                if int(product.Review_Count) > 150:
-                    eligible.append(product)
-            except Exception:
-                continue
-
-        def rating_key(p: Product):
-            try:
-                rating = float(p.Rating_Score) if p.Rating_Score else 0.0
-            except ValueError:
-                rating = 0.0
-            return (-rating, -int(p.Review_Count))
-
-        eligible.sort(key=rating_key)
-
-        ranked = []
-        current_rank = 0
-        last_rating = None
-        last_reviews = None
-
-        for idx, product in enumerate(eligible[:20], 1):
-            try:
-                rating = float(product.Rating_Score) if product.Rating_Score else 0.0
-                reviews = int(product.Review_Count)
-            except Exception:
-                continue
-
-            if rating != last_rating or reviews != last_reviews:
-                current_rank = idx
-            last_rating = rating
-            last_reviews = reviews
-
-            ranked.append({
-                "Rank": current_rank,
-                "Product_Name": product.Product_Name,
-                "Rating_Score": product.Rating_Score,
-                "Review_Count": product.Review_Count,
-                "Original_Price": product.Original_Price,
-                "Discount_Price": product.Discount_Price,
-                "Product_URL": product.Product_URL,
-            })
+        ranked = top_rated(vars(product) for product in self.products)
 
         headers = [
             "Rank",
@@ -749,22 +1020,123 @@ class NikeScraperPH:
 
         logger.info("Saved top 20 rating/review ranking to %s", filename)
 
-    def run(self) -> None:
-        self.load_all_products()
+    def run(
+        self,
+        products_file: str = "products_data.csv",
+        ranking_file: str = "top_20_rating_review.csv",
+        stats_file: Optional[str] = STATS_FILE,
+        metrics_file: Optional[str] = "metrics.json",
+        profile_file: Optional[str] = None,
+        ranking_only: bool = False,
+    ) -> None:
+        try:
+            with profiled(profile_file):
+                if ranking_only:
+                    self.refresh_ranking(products_file, ranking_file, stats_file)
+                else:
+                    self.crawl_and_export(products_file, ranking_file, stats_file)
+        finally:
+            if metrics_file:
+                metrics.write_json(metrics_file)
+
+    def crawl_and_export(self, products_file: str, ranking_file: str, stats_file: Optional[str] = None) -> None:
+        self.crawl_streaming()
         if not self.products:
             logger.warning("No products found")
             return
 
-        self.enrich_products()
+        self.refresh_review_summaries()
         self.count_empty_tagging()
-
-        valid_products = self.get_valid_products()
-        self.save_products_csv(valid_products, "products_data.csv")
-
-        self.print_top_expensive([p for p in self.products if p.Discount_Price.strip()])
-        self.save_top_20_rating_review()
+        self.export(products_file, ranking_file, stats_file)
+
+    def export(self, products_file: str, ranking_file: str, stats_file: Optional[str] = None) -> None:
+        with metrics.stage("export"):
+            valid_products = self.get_valid_products()
+            self.save_products_csv(valid_products, products_file)
+
+            self.print_top_expensive([p for p in self.products if p.Discount_Price.strip()])
+            self.save_top_20_rating_review(ranking_file)
+            self.save_catalog_stats(stats_file, valid_products)
+            # Budget-skipped products are left out, so their pages are parsed and enriched next run.
+            self.snapshot.save(
+                {
+                    p.Product_URL: {key: getattr(p, key) for key in CSV_HEADERS}
+                    for p in self.products
+                    if p.Product_URL not in self.unenriched
+                }
+            )
+
+    def save_catalog_stats(self, filename: Optional[str], products: List[Product]) -> None:
+        # Dashboards read these instead of scanning the products table, so they
+        # cover exactly the exported products that catalog_ingest.py uploads.
+        if not filename:
+            return
+        save_stats(compute_stats(vars(product) for product in products), filename)
+        logger.info("Saved catalog stats to %s", filename)
+
+    def refresh_ranking(self, products_file: str, ranking_file: str, stats_file: Optional[str] = None) -> None:
+        # Re-rank the last export with current review summaries; no listing or PDP requests.
+        self.load_products_csv(products_file)
+        self.refresh_review_summaries()
+        with metrics.stage("export"):
+            self.save_products_csv(self.products, products_file)
+            self.save_top_20_rating_review(ranking_file)
+            self.save_catalog_stats(stats_file, self.products)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scrape Nike PH women's products")
+    parser.add_argument("--metrics-file", default="metrics.json", help="Where to write run metrics as JSON")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port during the run")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Sample the run and write profile.folded (flamegraph input) and profile.json",
+    )
+    parser.add_argument(
+        "--refresh-ranking",
+        action="store_true",
+        help="Update ratings in products_data.csv from the reviews backend and rebuild the ranking, without crawling",
+    )
+    parser.add_argument("--review-cache", default=REVIEW_CACHE_FILE, help="Review summary cache file")
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Parse and enrich every listing page, even if unchanged since the last run",
+    )
+    parser.add_argument(
+        "--enrichment-seconds",
+        type=float,
+        default=0.0,
+        help="Stop fetching PDPs after this many seconds; the most valuable products are fetched first",
+    )
+    parser.add_argument("--enrichment-requests", type=int, default=0, help="Fetch at most this many PDPs")
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=PARSE_PROCESSES,
+        help="Parse PDPs in this many worker processes; 0 parses in the calling thread",
+    )
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    scraper = NikeScraperPH(
+        market=Market(
+            enrichment_seconds=args.enrichment_seconds,
+            enrichment_requests=args.enrichment_requests,
+            parse_processes=args.parse_processes,
+        ),
+        review_cache_file=args.review_cache,
+        snapshot_file=None if args.no_snapshot else LISTING_SNAPSHOT_FILE,
+    )
+    scraper.run(
+        metrics_file=args.metrics_file,
+        profile_file="profile" if args.profile else None,
+        ranking_only=args.refresh_ranking,
+    )
 
 
 if __name__ == "__main__":
-    scraper = NikeScraperPH()
-    scraper.run()
+    main()
@@ -1,4 +1,5 @@
 
+import argparse
 import csv
 import logging
 import os
@@ -15,6 +16,9 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.core.os_manager import ChromeType
 
+from instrumentation import metrics
+from profiler import profiled
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -417,11 +421,13 @@ class NikeScraperPH:
             logger.info("Starting Nike Philippines Product Scraper")
             logger.info(f"Target URL: {self.base_url}")
             
-            self.scrape_products()
-            self.validate_and_filter_products()
-            self.save_to_csv("products_data.csv")
-            self.get_top_expensive_products(limit=10)
-            self.create_rating_review_ranking("top_20_rating_review.csv", review_threshold=150)
+            with metrics.stage("selenium_listing"):
+                self.scrape_products()
+            with metrics.stage("export"):
+                self.validate_and_filter_products()
+                self.save_to_csv("products_data.csv")
+                self.get_top_expensive_products(limit=10)
+                self.create_rating_review_ranking("top_20_rating_review.csv", review_threshold=150)
             
             logger.info("\n" + "="*60)
             logger.info("Scraping completed successfully!")
@@ -438,8 +444,13 @@ class NikeScraperPH:
 
 def main():
     
+    parser = argparse.ArgumentParser(description="Scrape Nike PH women's products with Selenium")
+    parser.add_argument("--profile", action="store_true", help="Write profile.folded/.json next to the CSVs")
+    args = parser.parse_args()
+    
     scraper = NikeScraperPH()
-    scraper.run()
+    with profiled("profile" if args.profile else None):
+        scraper.run()
 
 
 if __name__ == "__main__":
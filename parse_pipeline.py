@@ -0,0 +1,159 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Tuple
+
+from instrumentation import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+FETCH_WORKERS = 4
+PARSE_PROCESSES = 0
+QUEUE_SIZE = 32
+
+_DONE = object()
+
+
+def parse_context() -> Any:
+    # Parse workers must not be forked from a process whose fetch threads may
+    # hold logging, connection-pool or queue locks; a forkserver forks them
+    # from a clean single-threaded server instead.
+    import multiprocessing
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def timed_parse(parse: Callable[[bytes], Any], raw: bytes) -> Tuple[Any, float]:
+    # Runs in the worker so the reported time is parse CPU, not queueing.
+    started = time.perf_counter()
+    result = parse(raw)
+    return result, time.perf_counter() - started
+
+
+class FetchParsePipeline:
+    """Fetch with threads, parse in a process pool.
+
+    ``fetch(item)`` returns raw bytes (or None to skip) and runs in I/O threads.
+    ``parse(raw)`` must be a picklable module-level function; it runs in worker
+    processes so CPU-bound parsing is not serialized by the GIL. The raw queue
+    and the in-flight limit on the pool give backpressure in both directions.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Any], Optional[bytes]],
+        parse: Callable[[bytes], Any],
+        fetch_workers: int = FETCH_WORKERS,
+        parse_processes: int = PARSE_PROCESSES,
+        queue_size: int = QUEUE_SIZE,
+    ):
+        self.fetch = fetch
+        self.parse = parse
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_processes = parse_processes
+        self.queue_size = queue_size
+        self.fetched = 0
+        self.fetch_errors = 0
+        self.parse_errors = 0
+
+    def _fetch_loop(self, items: Iterator[Any], lock: threading.Lock, raw_queue: "queue.Queue") -> None:
+        while True:
+            with lock:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+            try:
+                raw = self.fetch(item)
+            except Exception as exc:
+                logger.warning("Fetch failed for %s: %s", item, exc)
+                with lock:
+                    self.fetch_errors += 1
+                continue
+            if raw is None:
+                continue
+            with lock:
+                self.fetched += 1
+            raw_queue.put((item, raw))
+
+    def _start_fetchers(self, items: Iterable[Any], raw_queue: "queue.Queue") -> None:
+        iterator = iter(items)
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self._fetch_loop, args=(iterator, lock, raw_queue), daemon=True)
+            for _ in range(self.fetch_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        def close() -> None:
+            for thread in threads:
+                thread.join()
+            raw_queue.put(_DONE)
+
+        threading.Thread(target=close, daemon=True).start()
+
+    def run(self, items: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        raw_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+
+        if self.parse_processes <= 0:
+            self._start_fetchers(items, raw_queue)
+            while True:
+                entry = raw_queue.get()
+                if entry is _DONE:
+                    return
+                item, raw = entry
+                try:
+                    result, elapsed = timed_parse(self.parse, raw)
+                except Exception as exc:
+                    logger.warning("Parse failed for %s: %s", item, exc)
+                    self.parse_errors += 1
+                    continue
+                metrics.observe("parse_seconds", elapsed, kind=self.parse.__name__)
+                yield item, result
+
+        max_in_flight = self.parse_processes * 2
+        pending: Deque[Tuple[Any, Future]] = deque()
+
+        def drain(block: bool) -> Iterator[Tuple[Any, Any]]:
+            if block and pending:
+                wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+            for _ in range(len(pending)):
+                item, future = pending.popleft()
+                if not future.done():
+                    pending.append((item, future))
+                    continue
+                try:
+                    result, elapsed = future.result()
+                except Exception as exc:
+                    logger.warning("Parse failed for %s: %s", item, exc)
+                    self.parse_errors += 1
+                    continue
+                metrics.observe("parse_seconds", elapsed, kind=self.parse.__name__)
+                yield item, result
+
+        # concurrent.futures loads the process pool (and multiprocessing) on first access.
+        from concurrent.futures import ProcessPoolExecutor
+
+        # The pool exists before any fetch thread starts.
+        with ProcessPoolExecutor(max_workers=self.parse_processes, mp_context=parse_context()) as executor:
+            self._start_fetchers(items, raw_queue)
+            while True:
+                entry = raw_queue.get()
+                if entry is _DONE:
+                    break
+                item, raw = entry
+                while len(pending) >= max_in_flight:
+                    yield from drain(block=True)
+                pending.append((item, executor.submit(timed_parse, self.parse, raw)))
+                yield from drain(block=False)
+
+            while pending:
+                yield from drain(block=True)
@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from instrumentation import SERVER_THREAD, metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+# 100 Hz keeps the GIL cost of sampling well under 1% of a run.
+SAMPLE_INTERVAL = 0.01
+PROFILER_THREAD = "sampling-profiler"
+IGNORED_THREADS = {PROFILER_THREAD, SERVER_THREAD}
+MAX_DEPTH = 64
+TOP_FUNCTIONS = 15
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Checked from the innermost frame outwards; the first match names the sample.
+# Entries with a ":" also match on the function name.
+CATEGORY_RULES: List[Tuple[str, str]] = [
+    ("http_client:acquire", "rate_limit"),
+    ("bs4", "html_parsing"),
+    ("soupsieve", "html_parsing"),
+    ("html.parser", "html_parsing"),
+    ("lxml", "html_parsing"),
+    ("re", "regex"),
+    ("sre_compile", "regex"),
+    ("sre_parse", "regex"),
+    ("json", "json"),
+    ("csv", "export"),
+    ("socket", "network"),
+    ("ssl", "network"),
+    ("selectors", "network"),
+    ("http.client", "network"),
+    ("urllib3", "network"),
+    ("requests", "network"),
+    ("httpx", "network"),
+    ("httpcore", "network"),
+    ("h2", "network"),
+    ("threading", "waiting"),
+    ("queue", "waiting"),
+    ("concurrent.futures", "waiting"),
+    ("multiprocessing", "waiting"),
+]
+# Anything driven through Selenium is browser time, whatever the leaf frame is.
+BROWSER_MODULES = ("selenium",)
+
+
+def frame_module(frame) -> str:
+    return frame.f_globals.get("__name__", "") or os.path.basename(frame.f_code.co_filename)
+
+
+def matches(module: str, prefix: str) -> bool:
+    return module == prefix or module.startswith(prefix + ".")
+
+
+def categorize(stack: List[Tuple[str, str, str]]) -> str:
+    # stack is outermost first: (module, function, filename)
+    if any(matches(module, prefix) for module, _, _ in stack for prefix in BROWSER_MODULES):
+        return "browser"
+    for module, function, filename in reversed(stack):
+        for rule, category in CATEGORY_RULES:
+            prefix, _, wanted = rule.partition(":")
+            if matches(module, prefix) and (not wanted or function == wanted):
+                return category
+        if filename.startswith(PROJECT_DIR):
+            return "python"
+    return "other"
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler that tags every sample with its metrics stage.
+
+    A daemon thread snapshots all thread stacks via ``sys._current_frames`` and
+    counts them per stage, so the cost is one stack walk per thread per tick
+    rather than a hook on every call. Only this process is sampled; work in
+    parse worker processes shows up as the parent waiting on results.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.categories: Dict[str, Counter] = {}
+        self.self_samples: Dict[str, Counter] = {}
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=PROFILER_THREAD, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def thread_name(self, ident: int) -> str:
+        name = self.thread_names.get(ident)
+        if name is None:
+            self.thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self.thread_names.get(ident, str(ident))
+        return name
+
+    def sample(self) -> None:
+        for ident, frame in sys._current_frames().items():
+            if self.thread_name(ident) in IGNORED_THREADS:
+                continue
+            stack: List[Tuple[str, str, str]] = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                code = frame.f_code
+                stack.append((frame_module(frame), code.co_name, code.co_filename))
+                frame = frame.f_back
+            if not stack:
+                continue
+            stack.reverse()
+
+            stage = metrics.stage_of(ident) or "unstaged"
+            labels = tuple(f"{module}:{function}" for module, function, _ in stack)
+            self.stacks[(stage,) + labels] += 1
+            self.categories.setdefault(stage, Counter())[categorize(stack)] += 1
+            self.self_samples.setdefault(stage, Counter())[labels[-1]] += 1
+            self.samples += 1
+
+    def collapsed(self) -> List[str]:
+        # Brendan Gregg's folded format: "frame;frame;frame count", stage as the root frame.
+        return [
+            f"[{stack[0]}];" + ";".join(stack[1:]) + f" {count}"
+            for stack, count in sorted(self.stacks.items())
+        ]
+
+    def summary(self) -> dict:
+        stages = {}
+        for stage, categories in sorted(self.categories.items()):
+            total = sum(categories.values())
+            stages[stage] = {
+                "samples": total,
+                "seconds": round(total * self.interval, 3),
+                "categories": {
+                    name: {"samples": count, "share": round(count / total, 3)}
+                    for name, count in categories.most_common()
+                },
+                "top_functions": [
+                    {"function": name, "samples": count}
+                    for name, count in self.self_samples[stage].most_common(TOP_FUNCTIONS)
+                ],
+            }
+        return {
+            "interval_seconds": self.interval,
+            "wall_seconds": round(self.elapsed, 3),
+            "samples": self.samples,
+            "stages": stages,
+        }
+
+    def write(self, path_prefix: str) -> Tuple[str, str]:
+        folded_path = path_prefix + ".folded"
+        summary_path = path_prefix + ".json"
+        with open(folded_path, "w", encoding="utf-8") as folded_file:
+            folded_file.write("\n".join(self.collapsed()) + "\n")
+        with open(summary_path, "w", encoding="utf-8") as summary_file:
+            json.dump(self.summary(), summary_file, indent=2)
+        logger.info("Saved profile (%s samples) to %s and %s", self.samples, folded_path, summary_path)
+        return folded_path, summary_path
+
+
+@contextmanager
+def profiled(path_prefix: Optional[str], interval: float = SAMPLE_INTERVAL) -> Iterator[Optional[SamplingProfiler]]:
+    """Profile the enclosed block and write ``<prefix>.folded`` / ``<prefix>.json``.
+
+    A ``None`` prefix disables profiling, so callers can wrap a run unconditionally.
+    """
+    if not path_prefix:
+        yield None
+        return
+
+    profiler = SamplingProfiler(interval).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.write(path_prefix)
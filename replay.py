@@ -0,0 +1,291 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from base64 import b64decode, b64encode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from http_client import REPLAY_ENV, REPLAY_HOST_HEADER, REPLAY_STATIC_PREFIX
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PORT = 8765
+STATIC_PREFIX = REPLAY_STATIC_PREFIX
+SCRIPT_PATTERN = re.compile(r"<script\b.*?</script\s*>", re.I | re.S)
+HEAD_PATTERN = re.compile(r"<head\b[^>]*>", re.I)
+KEPT_HEADERS = {"content-type", "retry-after", "cache-control"}
+
+
+def request_key(method: str, host: str, path: str, query: str = "", body: Union[str, bytes, None] = None) -> str:
+    # Query order and request bodies (search API POSTs) are part of the identity.
+    normalized = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    key = f"{method.upper()} {host.lower()}{path or '/'}"
+    if normalized:
+        key += "?" + normalized
+    if body:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        key += " #" + hashlib.sha1(body).hexdigest()[:12]
+    return key
+
+
+class ReplayArchive:
+    def __init__(self):
+        self.entries: Dict[str, List[dict]] = {}
+        self.cursors: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self.entries.values())
+
+    def add(self, key: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        entry = {
+            "key": key,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() in KEPT_HEADERS},
+            "body": b64encode(body).decode("ascii"),
+        }
+        with self.lock:
+            self.entries.setdefault(key, []).append(entry)
+
+    def get(self, key: str) -> Optional[dict]:
+        # Repeated requests cycle through the recorded responses in order.
+        with self.lock:
+            items = self.entries.get(key)
+            if not items:
+                return None
+            index = self.cursors.get(key, 0)
+            self.cursors[key] = index + 1
+            return items[index % len(items)]
+
+    def save(self, path: str) -> None:
+        with gzip.open(path, "wt", encoding="utf-8") as archive_file:
+            for items in self.entries.values():
+                for entry in items:
+                    archive_file.write(json.dumps(entry) + "\n")
+        logger.info("Saved %s recorded responses to %s", len(self), path)
+
+    @classmethod
+    def load(cls, path: str) -> "ReplayArchive":
+        archive = cls()
+        with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+            for line in archive_file:
+                if line.strip():
+                    entry = json.loads(line)
+                    archive.entries.setdefault(entry["key"], []).append(entry)
+        return archive
+
+    def bodies(self, host_path: str = "") -> List[bytes]:
+        return [
+            b64decode(entry["body"])
+            for items in self.entries.values()
+            for entry in items
+            if host_path in entry["key"]
+        ]
+
+
+class Recorder:
+    def __init__(self, archive: Optional[ReplayArchive] = None):
+        self.archive = archive or ReplayArchive()
+
+    def attach(self, session) -> None:
+        session.hooks.setdefault("response", []).append(self.record_response)
+
+    def record_response(self, response, *args, **kwargs):
+        # requests and httpx (Http2Session) responses; httpx requests keep the body in .content.
+        request = response.request
+        parsed = urlparse(str(request.url))
+        host = request.headers.get(REPLAY_HOST_HEADER) or parsed.netloc
+        body = request.body if hasattr(request, "body") else request.content
+        key = request_key(request.method, host, parsed.path, parsed.query, body)
+        self.archive.add(key, response.status_code, dict(response.headers), response.content)
+        return response
+
+    def record_page(self, url: str, html: str) -> None:
+        """Store a browser-rendered page for the static mode under the URL the driver opened.
+
+        Scripts are dropped so the replayed DOM is not re-rendered (or
+        refetched live), and a <base> tag keeps relative links resolving
+        to the original site rather than the replay server.
+        """
+        parsed = urlparse(url)
+        html = SCRIPT_PATTERN.sub("", html)
+        base = f'<base href="{parsed.scheme}://{parsed.netloc}/">'
+        html, found = HEAD_PATTERN.subn(lambda match: match.group(0) + base, html, count=1)
+        if not found:
+            html = base + html
+        key = request_key("GET", parsed.netloc, parsed.path, parsed.query)
+        self.archive.add(key, 200, {"Content-Type": "text/html; charset=utf-8"}, html.encode("utf-8"))
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        archive: ReplayArchive,
+        port: int = DEFAULT_PORT,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0,
+    ):
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.archive = archive
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.served = 0
+        self.misses = 0
+        self.injected = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def draw(self) -> tuple:
+        with self.rng_lock:
+            delay = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+            fail = self.rng.random() < self.error_rate
+        return max(0.0, delay) / 1000.0, fail
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.replay()
+
+    def do_POST(self) -> None:
+        self.replay()
+
+    def replay(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        parsed = urlparse(self.path)
+        host = self.headers.get(REPLAY_HOST_HEADER, "")
+        path = parsed.path
+        if not host and path.startswith(STATIC_PREFIX):
+            # Static mode for Selenium: /static/<host>/<path>
+            host, _, rest = path[len(STATIC_PREFIX):].partition("/")
+            path = "/" + rest
+
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+
+        if fail:
+            self.server.injected += 1
+            self.respond(self.server.error_status, {"Content-Type": "text/plain", "Retry-After": "0"}, b"injected error")
+            return
+
+        entry = self.server.archive.get(request_key(self.command, host, path, parsed.query, body))
+        if entry is None:
+            self.server.misses += 1
+            self.respond(404, {"Content-Type": "text/plain"}, b"not recorded")
+            return
+
+        self.server.served += 1
+        self.respond(entry["status"], entry["headers"], b64decode(entry["body"]))
+
+    def respond(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+def record_nike(output: str, market_code: str, config: str) -> None:
+    from nike_markets import load_markets
+    from nike_scraper import NikeScraperPH
+
+    markets = load_markets(config, [market_code])
+    # No snapshot: every page must go over the wire to be recorded.
+    scraper = NikeScraperPH(market=markets[0] if markets else None, snapshot_file=None)
+    recorder = Recorder()
+    recorder.attach(scraper.session)
+    scraper.crawl_streaming()
+    recorder.archive.save(output)
+
+
+def record_jungle(output: str, query: str, country: str) -> None:
+    from jungle_search_api import JungleSearchClient
+
+    client = JungleSearchClient()
+    recorder = Recorder()
+    recorder.attach(client.session)
+    client.search(query, country)
+    recorder.archive.save(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record scraper traffic and replay it offline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="Run a scraper live and capture every response")
+    record.add_argument("target", choices=["nike", "jungle"])
+    record.add_argument("--output", required=True, help="Archive path (.jsonl.gz)")
+    record.add_argument("--market", default="PH")
+    record.add_argument("--config", default="markets.json")
+    record.add_argument("--query", default="Business")
+    record.add_argument("--country", default="US")
+
+    serve = subparsers.add_parser("serve", help="Serve a recorded archive")
+    serve.add_argument("archive")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--jitter-ms", type=float, default=0.0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--error-status", type=int, default=503)
+    serve.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        if args.target == "nike":
+            record_nike(args.output, args.market, args.config)
+        else:
+            record_jungle(args.output, args.query, args.country)
+        return
+
+    server = ReplayServer(
+        ReplayArchive.load(args.archive),
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    logger.info("Replaying %s responses on %s", len(server.archive), server.url)
+    logger.info("Point scrapers at it with %s=%s", REPLAY_ENV, server.url)
+    logger.info("Selenium pages are under %s%s<host>/<path>", server.url, STATIC_PREFIX)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info("Served %s, missed %s, injected %s errors", server.served, server.misses, server.injected)
+
+
+if __name__ == "__main__":
+    main()
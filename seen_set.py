@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import struct
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+
+SEEN_BACKENDS = ("memory", "bloom", "disk")
+DEFAULT_CAPACITY = 10_000_000
+DEFAULT_ERROR_RATE = 0.001
+# Bloom file header: magic, bit count, hash count, items added.
+BLOOM_MAGIC = b"SEEN1"
+BLOOM_HEADER = struct.Struct("<5sQIQ")
+# Disk mode commits in batches; a crash loses at most this many recent keys.
+DISK_COMMIT_EVERY = 10_000
+
+
+def key_digest(key: str) -> bytes:
+    # 128-bit digest: fixed size per key, and collisions are not a practical concern.
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+class SeenSet(ABC):
+    """Set of already-processed keys (usually canonical URLs).
+
+    ``add`` returns True when the key is new. Backends trade exactness for
+    memory: ``memory`` keeps every string, ``bloom`` a fixed-size bit array
+    with a configured false-positive rate, ``disk`` an SQLite table of
+    digests that persists between runs. Callers check membership while
+    collecting and ``update`` only once the items are safely written, so a
+    failed run never marks unsaved keys as done.
+    """
+
+    @abstractmethod
+    def add(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __contains__(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def update(self, keys: Iterable[str]) -> int:
+        return sum(1 for key in keys if self.add(key))
+
+    def close(self) -> None:
+        pass
+
+
+class ExactSeenSet(SeenSet):
+    def __init__(self):
+        self.keys: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def add(self, key: str) -> bool:
+        with self.lock:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class BloomSeenSet(SeenSet):
+    """Bloom filter sized for ``capacity`` keys at ``error_rate`` false positives.
+
+    Memory is fixed at about 1.8 MB per million keys for 0.1%. A false
+    positive reports a new key as seen, so it is skipped; there are no false
+    negatives. With a ``path`` the bit array is loaded and saved on close.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        path: Optional[str] = None,
+    ):
+        if not 0 < error_rate < 1:
+            raise ValueError(f"error_rate must be between 0 and 1, got {error_rate}")
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.path = path
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.warned = False
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def positions(self, key: str) -> List[int]:
+        # Double hashing: k positions from the two halves of one digest.
+        digest = key_digest(key)
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(first + index * second) % size for index in range(self.hashes)]
+
+    def add(self, key: str) -> bool:
+        positions = self.positions(key)
+        bits = self.bits
+        new = False
+        with self.lock:
+            for position in positions:
+                byte, mask = position >> 3, 1 << (position & 7)
+                if not bits[byte] & mask:
+                    bits[byte] |= mask
+                    new = True
+            if new:
+                self.count += 1
+                if self.count > self.capacity and not self.warned:
+                    self.warned = True
+                    logger.warning(
+                        "Bloom seen-set holds %s keys, above its capacity of %s; false positives will rise",
+                        self.count,
+                        self.capacity,
+                    )
+        return new
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def load(self) -> None:
+        with open(self.path, "rb") as bloom_file:
+            magic, size, hashes, count = BLOOM_HEADER.unpack(bloom_file.read(BLOOM_HEADER.size))
+            if magic != BLOOM_MAGIC:
+                raise ValueError(f"{self.path} is not a seen-set file")
+            bits = bytearray(bloom_file.read())
+        if len(bits) != (size + 7) // 8:
+            raise ValueError(f"{self.path} is truncated")
+        # The stored geometry wins; bit positions depend on it.
+        self.size, self.hashes, self.count, self.bits = size, hashes, count, bits
+        logger.info("Loaded bloom seen-set with %s keys from %s", count, self.path)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with self.lock, open(tmp_path, "wb") as bloom_file:
+            bloom_file.write(BLOOM_HEADER.pack(BLOOM_MAGIC, self.size, self.hashes, self.count))
+            bloom_file.write(self.bits)
+        os.replace(tmp_path, self.path)
+
+    def close(self) -> None:
+        self.save()
+
+
+class DiskSeenSet(SeenSet):
+    """Exact seen-set in an SQLite file, keyed by 16-byte digests of the keys.
+
+    Memory stays flat however many keys are stored; keys from earlier runs
+    count as seen.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS seen (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def add(self, key: str) -> bool:
+        with self.lock:
+            cursor = self.connection.execute("INSERT OR IGNORE INTO seen (digest) VALUES (?)", (key_digest(key),))
+            new = cursor.rowcount == 1
+            self.pending += new
+            if self.pending >= DISK_COMMIT_EVERY:
+                self.connection.commit()
+                self.pending = 0
+        return new
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM seen WHERE digest = ?", (key_digest(key),)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
+
+
+def open_seen_set(
+    backend: str = "memory",
+    path: Optional[str] = None,
+    capacity: int = DEFAULT_CAPACITY,
+    error_rate: float = DEFAULT_ERROR_RATE,
+) -> SeenSet:
+    if backend == "memory":
+        return ExactSeenSet()
+    if backend == "bloom":
+        return BloomSeenSet(capacity, error_rate, path)
+    if backend == "disk":
+        if not path:
+            raise ValueError("The disk seen-set needs a file path")
+        return DiskSeenSet(path)
+    raise ValueError(f"Unknown seen-set backend {backend!r}; expected one of {', '.join(SEEN_BACKENDS)}")
+
+
+def add_seen_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--seen-backend", choices=SEEN_BACKENDS, default="memory", help="Where to track processed links")
+    parser.add_argument(
+        "--seen-file",
+        help="Persist the seen-set here (bloom, disk); links from earlier runs are then skipped",
+    )
+    parser.add_argument("--seen-capacity", type=int, default=DEFAULT_CAPACITY, help="Bloom filter size in keys")
+    parser.add_argument("--seen-error-rate", type=float, default=DEFAULT_ERROR_RATE, help="Bloom false-positive rate")
+
+
+def seen_set_from_args(args: argparse.Namespace) -> SeenSet:
+    return open_seen_set(args.seen_backend, args.seen_file, args.seen_capacity, args.seen_error_rate)
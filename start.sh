@@ -1 +1 @@
-gunicorn app:app
+gunicorn -c gunicorn.conf.py app:app
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from instrumentation import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class TTLCache:
+    """LRU of small JSON records by key, with a TTL and optional JSON persistence.
+
+    Entries older than ``ttl`` seconds are treated as missing, so each key is
+    refetched at most once per period. With a ``path`` the cache survives
+    between runs. Lookups are reported as ``cache_requests_total{cache=name}``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def get(self, key: str, record: bool = True) -> Optional[Dict[str, str]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry["fetched_at"] > self.ttl:
+                hit = False
+                details = None
+            else:
+                self.entries.move_to_end(key)
+                hit = True
+                details = entry["details"]
+        if record:
+            metrics.cache_result(self.name, hit)
+        return details
+
+    def put(self, key: str, details: Dict[str, str]) -> None:
+        with self.lock:
+            self.entries[key] = {"fetched_at": time.time(), "details": details}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                stored = json.load(cache_file)
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable %s cache %s: %s", self.name, self.path, exc)
+            return
+        now = time.time()
+        with self.lock:
+            for key, entry in stored.items():
+                if now - entry.get("fetched_at", 0) <= self.ttl:
+                    self.entries[key] = entry
+        logger.info("Loaded %s cached %s entries from %s", len(self.entries), self.name, self.path)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self.lock:
+            snapshot = dict(self.entries)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(snapshot, cache_file)
+        os.replace(tmp_path, self.path)
+        logger.info("Saved %s cached %s entries to %s", len(snapshot), self.name, self.path)